@@ -1,16 +1,210 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse, urljoin
 import webbrowser
-from fpdf import FPDF
-from datetime import datetime
 import threading
 import queue
+import time
 import os
 import re
-from collections import OrderedDict
+import sqlite3
+from collections import OrderedDict, deque
+from parsers import available_backends
+from extractors import SCRAPE_MODES
+from scraper_core import Scraper
+from crawler import Crawler
+from job_store import JobStore, PENDING
+from retry_policy import RETRYABLE
+from change_tracker import ChangeTracker, UNCHANGED
+from metrics import BatchStats, RunProfiler
+from renderer import RenderPool, PLAYWRIGHT_AVAILABLE
+from http_session import DEFAULT_HEADERS
+from link_index import LinkIndex
+from url_import import UrlImport, clean_url
+from exporters import EXPORTERS, TxtExporter, format_for_path, open_exporter
+from pdf_report import export_pdf, find_fonts
+
+# Time the Tk thread may spend applying queued updates per tick, and tick intervals (ms)
+UPDATE_BUDGET_SECONDS = 0.02
+UPDATE_INTERVAL_BUSY = 16
+UPDATE_INTERVAL_IDLE = 100
+
+# Lines of each URL's result shown in the combined Results tab; the full result is in the Pages tab
+RESULT_PREVIEW_LINES = 200
+
+# Seconds between refreshes of the Timings tab during a fetch
+TIMINGS_REFRESH_SECONDS = 1.0
+
+# url_data value of a URL whose results are kept in the job store instead of in memory
+STORED = object()
+
+class UpdateQueue:
+    """Thread-safe channel for GUI updates posted by worker threads.
+
+    put() keeps (func, args) messages in order, like queue.Queue. put_latest()
+    replaces any pending update with the same key, so frequent state updates
+    (status text, progress, a listbox row) are applied once per tick at most.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ordered = deque()
+        self._latest = OrderedDict()
+    
+    def put(self, item):
+        with self._lock:
+            self._ordered.append(item)
+    
+    def put_latest(self, key, item):
+        with self._lock:
+            self._latest.pop(key, None)
+            self._latest[key] = item
+    
+    def get_nowait(self):
+        with self._lock:
+            if not self._ordered:
+                raise queue.Empty
+            return self._ordered.popleft()
+    
+    def take_latest(self):
+        """Remove and return the coalesced updates"""
+        with self._lock:
+            items = list(self._latest.values())
+            self._latest.clear()
+            return items
+    
+    def pending(self):
+        with self._lock:
+            return bool(self._ordered or self._latest)
+
+
+class VirtualListbox(ttk.Frame):
+    """Listbox for any number of rows that only draws the visible ones.
+
+    row_text(index) supplies a row's text when it scrolls into view. The
+    selection is a set of row indices, so selecting, testing and reading it
+    stay fast with hundreds of thousands of rows. Click toggles a row,
+    Shift+click selects the range from the last clicked row, Ctrl+A
+    selects all.
+    """
+    
+    def __init__(self, master, row_text, height=4, **options):
+        super().__init__(master)
+        self.row_text = row_text
+        self.count = 0
+        self.top = 0
+        self.selected = set()
+        self.anchor = None
+        
+        self.listbox = tk.Listbox(self, height=height, activestyle='none', exportselection=False, **options)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.select_colors = {
+            'background': self.listbox.cget('selectbackground'),
+            'foreground': self.listbox.cget('selectforeground'),
+        }
+        
+        # The Listbox's own selection and scrolling are replaced; its class bindings never run
+        self.listbox.bind('<Button-1>', self._on_click)
+        self.listbox.bind('<Shift-Button-1>', self._on_shift_click)
+        self.listbox.bind('<B1-Motion>', lambda event: 'break')
+        self.listbox.bind('<Double-Button-1>', lambda event: 'break')
+        self.listbox.bind('<Control-a>', lambda event: self.select_all() or 'break')
+        self.listbox.bind('<MouseWheel>', lambda event: self._scroll(-1 if event.delta > 0 else 1))
+        self.listbox.bind('<Button-4>', lambda event: self._scroll(-1))
+        self.listbox.bind('<Button-5>', lambda event: self._scroll(1))
+        self.listbox.bind('<Up>', lambda event: self._scroll(-1))
+        self.listbox.bind('<Down>', lambda event: self._scroll(1))
+        self.listbox.bind('<Prior>', lambda event: self._scroll(-self.rows))
+        self.listbox.bind('<Next>', lambda event: self._scroll(self.rows))
+    
+    @property
+    def rows(self):
+        return int(self.listbox.cget('height'))
+    
+    def set_count(self, count):
+        """Rows were appended (or the list grew); the selection is kept"""
+        self.count = count
+        self.redraw()
+    
+    def reset(self, count):
+        """The rows were replaced: clear the selection and scroll to the top"""
+        self.count = count
+        self.top = 0
+        self.selected = set()
+        self.anchor = None
+        self.redraw()
+    
+    def redraw(self):
+        """Redraw the visible rows and the scrollbar"""
+        self.top = max(0, min(self.top, self.count - self.rows))
+        end = min(self.count, self.top + self.rows)
+        self.listbox.delete(0, tk.END)
+        for index in range(self.top, end):
+            self.listbox.insert(tk.END, self.row_text(index))
+            if index in self.selected:
+                self.listbox.itemconfigure(index - self.top, **self.select_colors)
+        if self.count:
+            self.scrollbar.set(self.top / self.count, end / self.count)
+        else:
+            self.scrollbar.set(0, 1)
+    
+    def refresh_row(self, index):
+        """Redraw a row whose text changed, if it is visible"""
+        if self.top <= index < self.top + self.rows:
+            self.redraw()
+    
+    def yview(self, *args):
+        """Scrollbar command: ('moveto', fraction) or ('scroll', number, 'units' | 'pages')"""
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * self.count)
+        elif args[0] == 'scroll':
+            self.top += int(args[1]) * (self.rows if args[2] == 'pages' else 1)
+        self.redraw()
+    
+    def _scroll(self, rows):
+        self.top += rows
+        self.redraw()
+        return 'break'
+    
+    def _row_at(self, event):
+        row = self.listbox.nearest(event.y)
+        if row < 0:
+            return None  # no rows
+        index = self.top + row
+        return index if index < self.count else None
+    
+    def _on_click(self, event):
+        self.listbox.focus_set()
+        index = self._row_at(event)
+        if index is not None:
+            if index in self.selected:
+                self.selected.discard(index)
+            else:
+                self.selected.add(index)
+            self.anchor = index
+            self.redraw()
+        return 'break'
+    
+    def _on_shift_click(self, event):
+        index = self._row_at(event)
+        if index is None or self.anchor is None:
+            return self._on_click(event)
+        self.selected.update(range(min(index, self.anchor), max(index, self.anchor) + 1))
+        self.redraw()
+        return 'break'
+    
+    def select_all(self):
+        self.selected = set(range(self.count))
+        self.redraw()
+    
+    def curselection(self):
+        """Selected row indices in ascending order, like Listbox.curselection()"""
+        return tuple(sorted(self.selected))
+    
+    def selection_includes(self, index):
+        return index in self.selected
+
 
 class WebScraperApp:
     def __init__(self, root):
@@ -32,11 +226,41 @@ class WebScraperApp:
                       background=[('active', '#e1e1e1'), ('!active', '#f0f0f0')])
         
         # Queue for thread-safe GUI updates
-        self.queue = queue.Queue()
+        self.queue = UpdateQueue()
         
         # Dictionary to store URLs and their scraped data
         self.url_data = OrderedDict()
         
+        # Fetch metadata per URL (status code, bytes, timing) for exports
+        self.url_meta = {}
+        
+        # DejaVu font warning is shown once per session
+        self.font_warning_shown = False
+        
+        # URLs in listbox order, and the row of each URL for single-row updates
+        self.url_list = []
+        self.url_rows = {}
+        
+        # GUI-free fetch/extract pipeline (connection pool, cache, parse processes)
+        self.scraper = Scraper()
+        
+        # Persistent job store: fetched results are written there and read back on demand
+        try:
+            self.job_store = JobStore()
+        except (OSError, sqlite3.Error):
+            self.job_store = None
+        self.job = None
+        
+        # Snapshots of earlier runs, opened when "Changes only" is first used
+        self.change_tracker = None
+        
+        # Headless browser for script-rendered pages, launched when "Render JavaScript" is first used
+        self.renderer = None
+        
+        # Phase timings of the last fetch, shown in the Timings tab
+        self.batch_stats = None
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # Create widgets
         self.create_widgets()
         
@@ -79,6 +303,13 @@ class WebScraperApp:
             style='TButton'
         ).pack(side=tk.LEFT, padx=2)
         
+        ttk.Button(
+            url_buttons_frame,
+            text="Import URLs...",
+            command=self.import_urls,
+            style='TButton'
+        ).pack(side=tk.LEFT, padx=2)
+        
         ttk.Button(
             url_buttons_frame, 
             text="Clear All", 
@@ -86,14 +317,21 @@ class WebScraperApp:
             style='TButton'
         ).pack(side=tk.LEFT, padx=2)
         
+        ttk.Button(
+            url_buttons_frame,
+            text="Resume Job",
+            command=self.resume_job,
+            style='TButton'
+        ).pack(side=tk.LEFT, padx=2)
+        
         # URL List display
         self.url_list_frame = ttk.Frame(main_frame)
         self.url_list_frame.pack(fill=tk.X, pady=5)
         
-        self.url_listbox = tk.Listbox(
+        self.url_listbox = VirtualListbox(
             self.url_list_frame,
+            self.url_row_text,
             height=4,
-            selectmode=tk.MULTIPLE,
             font=('Consolas', 9),
             bg='white',
             relief=tk.SUNKEN
@@ -105,24 +343,111 @@ class WebScraperApp:
         options_frame.pack(fill=tk.X, pady=10)
         
         ttk.Label(options_frame, text="Scrape Content:").pack(side=tk.LEFT)
-        self.scrape_type = tk.StringVar(value="text")
-        
-        options = [
-            ("Text Content", "text"),
-            ("All Links", "links"),
-            ("Images", "images"),
-            ("Headings", "headings"),
-            ("Tables", "tables")
-        ]
+        self.scrape_modes = OrderedDict()
         
-        for text, mode in options:
-            ttk.Radiobutton(
+        for mode, text in SCRAPE_MODES.items():
+            self.scrape_modes[mode] = tk.BooleanVar(value=(mode == "text"))
+            ttk.Checkbutton(
                 options_frame, 
                 text=text, 
-                variable=self.scrape_type, 
-                value=mode
+                variable=self.scrape_modes[mode]
             ).pack(side=tk.LEFT, padx=5)
         
+        # Parser backend
+        backends = ['auto'] + available_backends()
+        self.parser_backend = tk.StringVar(value='auto')
+        ttk.Combobox(
+            options_frame,
+            values=backends,
+            width=11,
+            state='readonly',
+            textvariable=self.parser_backend
+        ).pack(side=tk.RIGHT, padx=5)
+        ttk.Label(options_frame, text="Parser:").pack(side=tk.RIGHT)
+        
+        # Concurrency options
+        self.max_workers = tk.IntVar(value=8)
+        self.per_host_limit = tk.IntVar(value=2)
+        
+        ttk.Spinbox(
+            options_frame,
+            from_=1,
+            to=64,
+            width=4,
+            textvariable=self.per_host_limit
+        ).pack(side=tk.RIGHT, padx=5)
+        ttk.Label(options_frame, text="Per Host:").pack(side=tk.RIGHT)
+        
+        ttk.Spinbox(
+            options_frame,
+            from_=1,
+            to=64,
+            width=4,
+            textvariable=self.max_workers
+        ).pack(side=tk.RIGHT, padx=5)
+        ttk.Label(options_frame, text="Concurrency:").pack(side=tk.RIGHT)
+        
+        # Crawl options: follow discovered links breadth-first
+        crawl_frame = ttk.Frame(main_frame)
+        crawl_frame.pack(fill=tk.X)
+        
+        self.crawl_enabled = tk.BooleanVar(value=False)
+        self.crawl_depth = tk.IntVar(value=2)
+        self.crawl_max_pages = tk.IntVar(value=100)
+        self.crawl_same_domain = tk.BooleanVar(value=True)
+        
+        ttk.Checkbutton(
+            crawl_frame,
+            text="Crawl links",
+            variable=self.crawl_enabled
+        ).pack(side=tk.LEFT)
+        ttk.Label(crawl_frame, text="Depth:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Spinbox(
+            crawl_frame,
+            from_=0,
+            to=20,
+            width=4,
+            textvariable=self.crawl_depth
+        ).pack(side=tk.LEFT, padx=5)
+        ttk.Label(crawl_frame, text="Max Pages:").pack(side=tk.LEFT)
+        ttk.Spinbox(
+            crawl_frame,
+            from_=1,
+            to=1000000,
+            width=8,
+            textvariable=self.crawl_max_pages
+        ).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(
+            crawl_frame,
+            text="Same domain only",
+            variable=self.crawl_same_domain
+        ).pack(side=tk.LEFT, padx=5)
+        
+        # robots.txt applies to every fetch, not only crawls
+        self.obey_robots = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            crawl_frame,
+            text="Obey robots.txt",
+            variable=self.obey_robots
+        ).pack(side=tk.RIGHT, padx=5)
+        
+        # Show and export only what changed since the previous run of each URL
+        self.changes_only = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            crawl_frame,
+            text="Changes only",
+            variable=self.changes_only
+        ).pack(side=tk.RIGHT, padx=5)
+        
+        # Render pages whose static HTML is an empty shell in a headless browser (needs playwright)
+        self.render_js = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            crawl_frame,
+            text="Render JavaScript",
+            variable=self.render_js,
+            state=tk.NORMAL if PLAYWRIGHT_AVAILABLE else tk.DISABLED
+        ).pack(side=tk.RIGHT, padx=5)
+        
         # Buttons frame
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill=tk.X, pady=10)
@@ -133,7 +458,9 @@ class WebScraperApp:
             ("Clear Results", self.clear_results, '#f44336'),
             ("Open Selected", self.open_selected_in_browser, '#2196F3'),
             ("Export to TXT", self.export_to_txt, '#607D8B'),
-            ("Export to PDF", self.export_to_pdf, '#9C27B0')
+            ("Export to PDF", self.export_to_pdf, '#9C27B0'),
+            ("Export Data", self.export_data, '#607D8B'),
+            ("Export Link Index", self.export_link_index, '#607D8B')
         ]
         
         for text, command, color in buttons:
@@ -146,6 +473,14 @@ class WebScraperApp:
             btn.pack(side=tk.LEFT, padx=2)
             btn.configure(style='TButton')
         
+        # Write results to a file as each URL completes
+        self.live_export = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            button_frame,
+            text="Export while fetching",
+            variable=self.live_export
+        ).pack(side=tk.LEFT, padx=5)
+        
         # Progress bar
         self.progress = ttk.Progressbar(main_frame, mode='determinate')
         self.progress.pack(fill=tk.X, pady=5)
@@ -154,7 +489,21 @@ class WebScraperApp:
         results_frame = ttk.Frame(main_frame)
         results_frame.pack(fill=tk.BOTH, expand=True)
         
-        ttk.Label(results_frame, text="Scraped Results:", font=('Segoe UI', 11, 'bold')).pack(anchor=tk.W)
+        results_header = ttk.Frame(results_frame)
+        results_header.pack(fill=tk.X)
+        
+        ttk.Label(results_header, text="Scraped Results:", font=('Segoe UI', 11, 'bold')).pack(side=tk.LEFT)
+        
+        # Switch between stored results per mode without refetching
+        self.view_mode = tk.StringVar(value="text")
+        for mode, text in SCRAPE_MODES.items():
+            ttk.Radiobutton(
+                results_header,
+                text=text,
+                variable=self.view_mode,
+                value=mode,
+                command=self.show_view_results
+            ).pack(side=tk.LEFT, padx=5)
         
         # Create a Notebook for multiple tabs
         self.notebook = ttk.Notebook(results_frame)
@@ -173,6 +522,58 @@ class WebScraperApp:
         )
         self.results_text.pack(fill=tk.BOTH, expand=True)
         
+        # Per-URL pages tab: only the selected URL's result is loaded into the text widget
+        self.pages_tab = ttk.Frame(self.notebook)
+        self.notebook.add(self.pages_tab, text="Pages")
+        
+        self.page_listbox = tk.Listbox(
+            self.pages_tab,
+            width=40,
+            exportselection=False,
+            font=('Consolas', 9),
+            bg='white',
+            relief=tk.SUNKEN
+        )
+        self.page_listbox.pack(side=tk.LEFT, fill=tk.Y)
+        self.page_listbox.bind('<<ListboxSelect>>', lambda event: self.show_page())
+        self.page_urls = []
+        
+        self.page_text = scrolledtext.ScrolledText(
+            self.pages_tab,
+            wrap=tk.WORD,
+            font=('Consolas', 10),
+            padx=10,
+            pady=10
+        )
+        self.page_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        # Timings tab: latency percentiles, throughput and per-phase times of the last fetch
+        self.timings_tab = ttk.Frame(self.notebook)
+        self.notebook.add(self.timings_tab, text="Timings")
+        
+        timings_header = ttk.Frame(self.timings_tab)
+        timings_header.pack(fill=tk.X, pady=(5, 0))
+        ttk.Button(
+            timings_header,
+            text="Export Timings",
+            command=self.export_timings
+        ).pack(side=tk.LEFT, padx=2)
+        self.profile_run = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            timings_header,
+            text="Profile next fetch (cProfile + tracemalloc)",
+            variable=self.profile_run
+        ).pack(side=tk.LEFT, padx=5)
+        
+        self.timings_text = scrolledtext.ScrolledText(
+            self.timings_tab,
+            wrap=tk.NONE,
+            font=('Consolas', 10),
+            padx=10,
+            pady=10
+        )
+        self.timings_text.pack(fill=tk.BOTH, expand=True)
+        
         # Status Bar
         self.status_var = tk.StringVar()
         self.status_var.set("Ready")
@@ -186,48 +587,144 @@ class WebScraperApp:
     
     def process_queue(self):
         """Process messages from the queue (for thread-safe GUI updates)"""
+        # Coalesced updates carry the latest state, so apply them every tick
+        for func, args in self.queue.take_latest():
+            func(*args)
+        
+        # Ordered messages within the time budget; the rest wait for the next tick
+        deadline = time.perf_counter() + UPDATE_BUDGET_SECONDS
         try:
-            while True:
+            while time.perf_counter() < deadline:
                 func, args = self.queue.get_nowait()
                 func(*args)
         except queue.Empty:
             pass
-        self.root.after(100, self.process_queue)
+        
+        interval = UPDATE_INTERVAL_BUSY if self.queue.pending() else UPDATE_INTERVAL_IDLE
+        self.root.after(interval, self.process_queue)
     
     def add_url(self):
         """Add a URL to the list of URLs to scrape"""
-        url = self.url_entry.get().strip()
-        if not url:
+        text = self.url_entry.get().strip()
+        if not text:
             messagebox.showerror("Error", "Please enter a URL")
             return
         
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
+        url = clean_url(text)
+        if url is None:
+            messagebox.showerror("Error", f"Not a valid http(s) URL: {text}")
+            return
         
         if url in self.url_data:
             messagebox.showwarning("Warning", "This URL is already in the list")
             return
         
-        self.url_data[url] = None  # Initialize with no data
-        self.update_url_listbox()
+        self.append_urls([url])
         self.url_entry.delete(0, tk.END)
     
+    def append_urls(self, urls):
+        """Append URLs that are not in the list yet, with no data"""
+        for row, url in enumerate(urls, len(self.url_list)):
+            self.url_data[url] = None
+            self.url_rows[url] = row
+        self.url_list.extend(urls)
+        self.url_listbox.set_count(len(self.url_list))
+    
+    def import_urls(self):
+        """Add the URLs of a text, CSV or sitemap file; the file is read in a background thread"""
+        file_path = filedialog.askopenfilename(
+            title="Import URLs",
+            filetypes=[
+                ("URL lists", "*.txt *.csv *.xml *.gz"),
+                ("Text files", "*.txt"),
+                ("CSV files", "*.csv"),
+                ("Sitemaps", "*.xml *.xml.gz"),
+                ("All files", "*.*"),
+            ]
+        )
+        if not file_path:
+            return
+        
+        self.status_var.set(f"Importing URLs from {os.path.basename(file_path)}...")
+        threading.Thread(target=self._import_urls_thread, args=(file_path,), daemon=True).start()
+    
+    def _import_urls_thread(self, file_path):
+        """Read, validate and deduplicate an import; the Tk thread appends the result"""
+        # Lookups in url_data only; the Tk thread is the one changing it
+        importer = UrlImport(known=self.url_data, http=self.scraper.http)
+        try:
+            importer.read(file_path)
+        except Exception as e:
+            self.queue.put((self.show_error, (f"Failed to import {file_path}: {str(e)}",)))
+            return
+        self.queue.put((self.finish_import, (importer,)))
+    
+    def finish_import(self, importer):
+        """Append the URLs of a finished import and report its counts"""
+        # URLs added while the import ran are skipped here
+        urls = [url for url in importer.urls if url not in self.url_data]
+        self.append_urls(urls)
+        duplicates = importer.duplicates + len(importer.urls) - len(urls)
+        status = f"Imported {len(urls)} URLs, {duplicates} duplicates, {importer.invalid} invalid"
+        if importer.sitemaps:
+            status += f", from {importer.sitemaps} sitemaps"
+        self.status_var.set(status)
+        if importer.errors:
+            errors = "\n".join(f"{source}: {error}" for source, error in importer.errors[:10])
+            if len(importer.errors) > 10:
+                errors += f"\n... and {len(importer.errors) - 10} more"
+            messagebox.showwarning("Import URLs", f"Some sitemaps could not be read:\n\n{errors}")
+    
     def clear_urls(self):
         """Clear all URLs from the list"""
         self.url_data.clear()
+        self.url_meta.clear()
+        # The job stays in the store and can be resumed later
+        self.job = None
         self.update_url_listbox()
         self.clear_results()
     
     def update_url_listbox(self):
-        """Update the URL listbox display"""
-        self.url_listbox.delete(0, tk.END)
-        for url in self.url_data:
-            status = "✓" if self.url_data[url] is not None else " "
-            self.url_listbox.insert(tk.END, f"{status} {url}")
+        """Rebuild the URL list after url_data was replaced; only the visible rows are drawn"""
+        self.url_list = list(self.url_data)
+        self.url_rows = {url: row for row, url in enumerate(self.url_list)}
+        self.url_listbox.reset(len(self.url_list))
+    
+    def url_row_text(self, row):
+        url = self.url_list[row]
+        return f"{self.url_status(url)} {url}"
+    
+    def add_crawled_url(self, url, data, meta):
+        """Append a page discovered by a crawl to the URL list"""
+        new = url not in self.url_data
+        self.url_data[url] = data
+        self.url_meta[url] = meta
+        if new:
+            self.url_rows[url] = len(self.url_list)
+            self.url_list.append(url)
+            self.url_listbox.set_count(len(self.url_list))
+    
+    def url_status(self, url):
+        """Listbox marker: fetched, failed, unchanged since the last run or not fetched yet"""
+        meta = self.url_meta.get(url, {})
+        if meta.get('error'):
+            return "✗"
+        if meta.get('change_status') == UNCHANGED:
+            return "="
+        return "✓" if self.url_data.get(url) is not None else " "
+    
+    def update_url_row(self, url):
+        """Refresh a single URL's listbox row; rows out of view are drawn when scrolled to"""
+        row = self.url_rows.get(url)
+        if row is not None:
+            self.url_listbox.refresh_row(row)
     
     def clear_results(self):
         """Clear the results display"""
         self.results_text.delete(1.0, tk.END)
+        self.page_listbox.delete(0, tk.END)
+        self.page_text.delete(1.0, tk.END)
+        self.page_urls = []
         self.status_var.set("Ready")
     
     def clear_results_display(self):
@@ -241,7 +738,7 @@ class WebScraperApp:
             messagebox.showwarning("Warning", "Please select URLs to fetch")
             return
         
-        urls = [list(self.url_data.keys())[i] for i in selected_indices]
+        urls = [self.url_list[i] for i in selected_indices]
         self._fetch_urls(urls)
     
     def fetch_all_urls(self):
@@ -250,125 +747,257 @@ class WebScraperApp:
             messagebox.showwarning("Warning", "No URLs to fetch")
             return
         
-        self._fetch_urls(list(self.url_data.keys()))
+        self._fetch_urls(list(self.url_data.keys()), resume=True)
     
-    def _fetch_urls(self, urls):
-        """Fetch data from multiple URLs"""
+    def resume_job(self):
+        """Load the most recent job from the job store so its unfinished URLs can be fetched"""
+        job = self.job_store.latest_job() if self.job_store is not None else None
+        if job is None:
+            messagebox.showinfo("Resume Job", "No saved job to resume")
+            return
+        
+        self.url_data.clear()
+        self.url_meta.clear()
+        self.clear_results()
+        for url, status, meta in job.urls():
+            self.url_data[url] = STORED if status != PENDING else None
+            if status != PENDING:
+                self.url_meta[url] = meta
+                self.page_urls.append(url)
+                self.page_listbox.insert(tk.END, url)
+        self.job = job
+        
+        for mode, var in self.scrape_modes.items():
+            var.set(mode in job.modes)
+        if job.modes and self.view_mode.get() not in job.modes:
+            self.view_mode.set(job.modes[0])
+        self.update_url_listbox()
+        self.show_view_results()
+        self.status_var.set(f"Resumed job: {len(self.page_urls)} of {len(self.url_data)} URLs fetched")
+    
+    def prepare_job(self, urls, modes):
+        """Job that fetched results are recorded in; started on the first fetch of a URL list"""
+        if self.job_store is None:
+            return None
+        if self.job is None:
+            self.job = self.job_store.create_job(list(self.url_data), modes, name="gui")
+        else:
+            if self.job.modes != modes:
+                self.job.set_modes(modes)
+            self.job.add_urls(urls)
+        return self.job
+    
+    def results_for(self, url):
+        """A URL's results, read from the job store when they are not kept in memory"""
+        data = self.url_data.get(url)
+        if data is STORED:
+            return self.job.results(url) if self.job is not None else OrderedDict()
+        return data
+    
+    def _fetch_urls(self, urls, resume=False):
+        """Fetch data from multiple URLs.
+        
+        With resume, URLs the current job has already fetched with the same
+        modes, or that failed in a way not worth retrying, are skipped,
+        unless every URL has been.
+        """
+        # Read Tk variables here; they must not be touched from the worker thread
+        modes = [mode for mode, var in self.scrape_modes.items() if var.get()]
+        if not modes:
+            messagebox.showwarning("Warning", "Please select content to scrape")
+            return
+        if self.view_mode.get() not in modes:
+            self.view_mode.set(modes[0])
+        backend = self.parser_backend.get()
+        try:
+            max_workers = max(1, self.max_workers.get())
+            per_host_limit = max(1, self.per_host_limit.get())
+        except tk.TclError:
+            max_workers, per_host_limit = 8, 2
+        
+        self.scraper.obey_robots = self.obey_robots.get()
+        if self.changes_only.get() and self.change_tracker is None:
+            try:
+                self.change_tracker = ChangeTracker()
+            except (OSError, sqlite3.Error) as e:
+                messagebox.showerror("Error", f"Failed to open the change database: {str(e)}")
+                return
+        self.scraper.change_tracker = self.change_tracker if self.changes_only.get() else None
+        if self.render_js.get() and self.renderer is None:
+            try:
+                self.renderer = RenderPool(auto=True, user_agent=DEFAULT_HEADERS['User-Agent'])
+            except RuntimeError as e:
+                messagebox.showerror("Error", str(e))
+                return
+        self.scraper.renderer = self.renderer if self.render_js.get() else None
+        
+        if resume and self.job is not None and self.job.modes == modes:
+            unfinished = [url for url in urls if self.url_data.get(url) is None
+                          or self.url_meta.get(url, {}).get('error_type') in RETRYABLE]
+            if unfinished:
+                urls = unfinished
+        job = self.prepare_job(urls, modes)
+        
+        crawler = None
+        if self.crawl_enabled.get():
+            try:
+                depth, max_pages = max(0, self.crawl_depth.get()), max(1, self.crawl_max_pages.get())
+            except tk.TclError:
+                depth, max_pages = 2, 100
+            crawler = Crawler(self.scraper, depth, max_pages, self.crawl_same_domain.get())
+        
+        exporter = None
+        if self.live_export.get():
+            file_path = self.ask_export_path("Export Results While Fetching")
+            if not file_path:
+                return
+            try:
+                exporter = open_exporter(format_for_path(file_path, 'jsonl'), file_path)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to open export file: {str(e)}")
+                return
+        
+        profiler = None
+        if self.profile_run.get():
+            # Profiles a single run; the option is cleared once it has started
+            self.profile_run.set(False)
+            profiler = RunProfiler(cpu=True, memory=True)
+        self.batch_stats = BatchStats()
+        
         self.toggle_buttons(False)
         self.progress['value'] = 0
         self.status_var.set(f"Fetching data from {len(urls)} URLs...")
+        self.clear_results_display()
         
         # Start fetch in a separate thread
         threading.Thread(
             target=self._fetch_urls_thread, 
-            args=(urls,),
+            args=(urls, modes, backend, max_workers, per_host_limit, exporter, crawler, job, self.batch_stats,
+                  profiler),
             daemon=True
         ).start()
     
-    def _fetch_urls_thread(self, urls):
-        """Thread function to fetch multiple URLs"""
+    def _fetch_urls_thread(self, urls, modes, backend='auto', max_workers=8, per_host_limit=2, exporter=None, crawler=None,
+                           job=None, stats=None, profiler=None):
+        """Thread function to fetch multiple URLs concurrently"""
+        if profiler is not None:
+            profiler.start()
         try:
-            total_urls = len(urls)
-            for i, url in enumerate(urls):
-                try:
-                    self.queue.put((self.update_status, (f"Fetching {i+1}/{total_urls}: {url}",)))
-                    self.queue.put((self.update_progress, (i/total_urls*100,)))
-                    
-                    headers = {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                    }
-                    response = requests.get(url, headers=headers, timeout=10)
-                    response.raise_for_status()
-                    
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    scrape_type = self.scrape_type.get()
-                    
-                    if scrape_type == "text":
-                        result = self.scrape_text_content(soup)
-                    elif scrape_type == "links":
-                        result = self.scrape_links(soup, url)
-                    elif scrape_type == "images":
-                        result = self.scrape_images(soup, url)
-                    elif scrape_type == "headings":
-                        result = self.scrape_headings(soup)
-                    elif scrape_type == "tables":
-                        result = self.scrape_tables(soup)
-                    else:
-                        result = "Invalid scrape type"
-                    
-                    self.url_data[url] = result
-                    self.queue.put((self.update_url_listbox, ()))
-                    
-                except Exception as e:
-                    self.url_data[url] = f"Error fetching {url}: {str(e)}"
-                    self.queue.put((self.update_url_listbox, ()))
-                    continue
+            completed = failed = unchanged = 0
+            refreshed = time.perf_counter()
+            if crawler is not None:
+                # The page limit bounds the crawl, so progress is measured against it
+                total_urls = crawler.max_pages
+                results = crawler.crawl(urls, modes, backend, max_workers, per_host_limit)
+            else:
+                total_urls = len(urls)
+                results = self.scraper.fetch_urls(urls, modes, backend, max_workers, per_host_limit)
             
-            # Combine all results for display
-            combined_result = []
-            for url, data in self.url_data.items():
-                if data:
-                    combined_result.append(f"\n=== Results from {url} ===\n")
-                    combined_result.append(data)
-                    combined_result.append("\n" + "="*50 + "\n")
+            for completed, (url, data, meta) in enumerate(results, 1):
+                changes = meta.pop('changes', None)
+                if stats is not None:
+                    # Kept by the stats only, not in url_meta
+                    stats.add(url, meta)
+                    meta.pop('timings', None)
+                    if time.perf_counter() - refreshed >= TIMINGS_REFRESH_SECONDS:
+                        refreshed = time.perf_counter()
+                        self.queue.put_latest('timings', (self.update_timings, (stats.report(),)))
+                if job is not None:
+                    # The job keeps full results, so a resume or a later export has the whole page
+                    job.record(url, data, meta)
+                if changes is not None:
+                    # Only the (small) delta is shown; unchanged pages are shown empty
+                    meta['change_status'] = changes.status
+                    unchanged += changes.status == UNCHANGED
+                    data = changes.delta_results()
+                elif job is not None:
+                    data = STORED
+                if exporter is not None and (changes is None or changes.status != UNCHANGED):
+                    exporter.write(url, data, meta)
+                if url in self.url_data:
+                    self.url_data[url] = data
+                    self.url_meta[url] = meta
+                else:
+                    # Pages found by a crawl are added to url_data on the Tk thread, which iterates it
+                    self.queue.put((self.add_crawled_url, (url, data, meta)))
+                failed += bool(meta['error'])
+                self.queue.put_latest('status', (self.update_status, (f"Fetched {completed}/{total_urls}: {url}",)))
+                self.queue.put_latest('progress', (self.update_progress, (completed/total_urls*100,)))
+                self.queue.put_latest(('row', url), (self.update_url_row, (url,)))
+                self.queue.put((self.append_result, (url,)))
             
-            self.queue.put((self.update_results, ("\n".join(combined_result),)))
-            self.queue.put((self.update_status, (f"Successfully fetched data from {len(urls)} URLs",)))
+            status = f"Successfully fetched data from {completed - failed} URLs"
+            if failed:
+                status += f", {failed} failed"
+            if unchanged:
+                status += f", {unchanged} unchanged since the last run"
+            summary = crawler.summary() if crawler is not None else self.scraper.cache_summary()
+            if summary:
+                status += f" ({summary})"
+            
+            self.queue.put_latest('status', (self.update_status, (status,)))
             
         except Exception as e:
             self.queue.put((self.show_error, (f"Failed to fetch data: {str(e)}",)))
         finally:
+            report = stats.report() if stats is not None else ""
+            if profiler is not None:
+                profiler.stop()
+                report += "\n\n" + profiler.report()
+            self.queue.put_latest('timings', (self.update_timings, (report,)))
+            if exporter is not None:
+                exporter.close()
+            if job is not None:
+                job.store.flush()
             self.queue.put((self.toggle_buttons, (True,)))
-            self.queue.put((self.update_progress, (100,)))
-    
-    def scrape_text_content(self, soup):
-        """Scrape all text content from paragraphs and headings"""
-        paragraphs = [p.get_text().strip() for p in soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])]
-        paragraphs = [p for p in paragraphs if p]  # Remove empty strings
-        return "\n\n".join(paragraphs)
-    
-    def scrape_links(self, soup, base_url):
-        """Scrape all links from the page"""
-        links = []
-        for a in soup.find_all('a', href=True):
-            link = a['href']
-            if not link.startswith(('http://', 'https://')):
-                link = urljoin(base_url, link)
-            link_text = a.get_text().strip()
-            links.append(f"{link} ({link_text})" if link_text else link)
-        return "\n".join(links)
-    
-    def scrape_images(self, soup, base_url):
-        """Scrape all images from the page"""
-        images = []
-        for img in soup.find_all('img', src=True):
-            img_url = img['src']
-            if not img_url.startswith(('http://', 'https://')):
-                img_url = urljoin(base_url, img_url)
-            alt_text = img.get('alt', 'No alt text')
-            images.append(f"{img_url} (Alt: {alt_text})")
-        return "\n".join(images)
-    
-    def scrape_headings(self, soup):
-        """Scrape all headings from the page"""
-        headings = []
-        for level in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-            for heading in soup.find_all(level):
-                text = heading.get_text().strip()
-                if text:
-                    headings.append(f"{level.upper()}: {text}")
-        return "\n".join(headings)
-    
-    def scrape_tables(self, soup):
-        """Scrape all tables from the page"""
-        tables = []
-        for i, table in enumerate(soup.find_all('table'), 1):
-            tables.append(f"\n=== TABLE {i} ===\n")
-            for row in table.find_all('tr'):
-                cells = [cell.get_text().strip() for cell in row.find_all(['td', 'th'])]
-                tables.append(" | ".join(cells))
-            tables.append("\n")
-        return "\n".join(tables)
+            self.queue.put_latest('progress', (self.update_progress, (100,)))
+    
+    def format_result_section(self, url, result):
+        """Display text for one URL, cut to RESULT_PREVIEW_LINES lines"""
+        lines = result.split("\n", RESULT_PREVIEW_LINES)
+        if len(lines) > RESULT_PREVIEW_LINES:
+            hidden = lines.pop().count("\n") + 1
+            lines.append(f"... {hidden} more lines (see the Pages tab)")
+        return f"\n=== Results from {url} ===\n\n" + "\n".join(lines) + "\n\n" + "="*50 + "\n"
+    
+    def result_text(self, url):
+        """Result for the selected view mode, or the error of a failed URL"""
+        meta = self.url_meta.get(url) or {}
+        if meta.get('error'):
+            return f"Error ({meta.get('error_type')}, {meta.get('attempts', 1)} attempts): {meta['error']}"
+        return (self.results_for(url) or {}).get(self.view_mode.get(), "")
+    
+    def append_result(self, url):
+        """Add one completed URL to the results view"""
+        if self.url_data.get(url) is None:
+            return
+        
+        result = self.result_text(url)
+        if result:
+            self.results_text.insert(tk.END, self.format_result_section(url, result))
+        
+        if url not in self.page_urls:
+            self.page_urls.append(url)
+            self.page_listbox.insert(tk.END, url)
+        elif self.page_listbox.curselection() and self.page_urls[self.page_listbox.curselection()[0]] == url:
+            self.show_page()
+    
+    def show_view_results(self):
+        """Show stored results for the selected view mode"""
+        self.results_text.delete(1.0, tk.END)
+        for url, data in self.url_data.items():
+            result = self.result_text(url) if data is not None else ""
+            if result:
+                self.results_text.insert(tk.END, self.format_result_section(url, result))
+        self.show_page()
+    
+    def show_page(self):
+        """Load the selected URL's full result into the Pages tab"""
+        self.page_text.delete(1.0, tk.END)
+        selection = self.page_listbox.curselection()
+        if not selection:
+            return
+        self.page_text.insert(tk.END, self.result_text(self.page_urls[selection[0]]))
     
     def open_selected_in_browser(self):
         """Open selected URLs in default browser"""
@@ -377,7 +1006,7 @@ class WebScraperApp:
             messagebox.showwarning("Warning", "Please select URLs to open")
             return
         
-        urls = [list(self.url_data.keys())[i] for i in selected_indices]
+        urls = [self.url_list[i] for i in selected_indices]
         for url in urls:
             try:
                 webbrowser.open(url)
@@ -400,142 +1029,168 @@ class WebScraperApp:
             )
             
             if file_path:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    for url, data in self.url_data.items():
+                with TxtExporter(file_path) as exporter:
+                    for url in self.url_data:
+                        data = self.results_for(url)
                         if data:
-                            f.write(f"\n=== Results from {url} ===\n\n")
-                            f.write(data)
-                            f.write("\n" + "="*50 + "\n")
+                            exporter.write(url, data, self.url_meta.get(url))
+                
+                messagebox.showinfo("Success", f"All content exported to {file_path}")
+                self.status_var.set(f"Exported to {file_path}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export: {str(e)}")
+    
+    def ask_export_path(self, title):
+        """Ask for a JSONL/CSV/Parquet/TXT output file"""
+        filetypes = [
+            ("JSON Lines", "*.jsonl"),
+            ("CSV files", "*.csv"),
+            ("Text files", "*.txt"),
+            ("All files", "*.*")
+        ]
+        if 'parquet' in EXPORTERS:
+            filetypes.insert(2, ("Parquet files", "*.parquet"))
+        return filedialog.asksaveasfilename(defaultextension=".jsonl", filetypes=filetypes, title=title)
+    
+    def export_data(self):
+        """Export all results with fetch metadata as JSONL, CSV or Parquet"""
+        if not any(self.url_data.values()):
+            messagebox.showwarning("Warning", "No data to export")
+            return
+        
+        try:
+            file_path = self.ask_export_path("Save All Results as Data File")
+            if file_path:
+                with open_exporter(format_for_path(file_path, 'jsonl'), file_path) as exporter:
+                    # Failed URLs are written as error records
+                    for url in self.url_data:
+                        data = self.results_for(url)
+                        if data is not None:
+                            exporter.write(url, data, self.url_meta.get(url))
                 
                 messagebox.showinfo("Success", f"All content exported to {file_path}")
                 self.status_var.set(f"Exported to {file_path}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export: {str(e)}")
     
+    def export_link_index(self):
+        """Export every unique link and image of the results, with the pages using it, as CSV"""
+        link_index = LinkIndex()
+        for url in self.url_data:
+            data = self.results_for(url)
+            if data:
+                link_index.add_results(url, data)
+        if not len(link_index):
+            messagebox.showwarning("Warning", "No links or images to export; fetch with Links or Images selected")
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            title="Save Link Index as CSV"
+        )
+        if not file_path:
+            return
+        try:
+            link_index.write_csv(file_path)
+            self.status_var.set(f"Link index ({link_index.summary()}) exported to {file_path}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export link index: {str(e)}")
+    
+    def export_timings(self):
+        """Save the last fetch's per-URL phase timings and summary statistics as JSON"""
+        if self.batch_stats is None or not self.batch_stats.records:
+            messagebox.showwarning("Warning", "No timings to export; fetch some URLs first")
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            title="Save Timings as JSON"
+        )
+        if not file_path:
+            return
+        try:
+            self.batch_stats.to_json(file_path)
+            self.status_var.set(f"Timings exported to {file_path}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export timings: {str(e)}")
+    
     def export_to_pdf(self):
         """Export all results to a single PDF file"""
         if not any(self.url_data.values()):
             messagebox.showwarning("Warning", "No data to export")
             return
         
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")],
+            title="Save All Results as PDF File"
+        )
+        if not file_path:
+            return
+        
+        # Font lookup is cached, so this only warns on the first export
+        if not find_fonts() and not self.font_warning_shown:
+            self.font_warning_shown = True
+            messagebox.showwarning("Font Warning", 
+                "DejaVu fonts not found. Using Arial which may not support all characters.")
+        
+        self.toggle_buttons(False)
+        self.progress['value'] = 0
+        self.status_var.set("Exporting PDF...")
+        
+        # Build the PDF from a snapshot in the background so the GUI stays responsive
+        threading.Thread(
+            target=self._export_pdf_thread,
+            args=(OrderedDict((url, self.results_for(url)) for url in self.url_data), file_path),
+            daemon=True
+        ).start()
+    
+    def _export_pdf_thread(self, url_data, file_path):
+        """Thread function to build and save the PDF report"""
+        def report_progress(value):
+            self.queue.put_latest('progress', (self.update_progress, (value,)))
+        
         try:
-            file_path = filedialog.asksaveasfilename(
-                defaultextension=".pdf",
-                filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")],
-                title="Save All Results as PDF File"
-            )
-            
-            if not file_path:
-                return
-
-            # Create PDF with Unicode support
-            pdf = FPDF()
-            pdf.set_auto_page_break(auto=True, margin=15)
-
-            # Configure fonts with multiple fallback options
-            font_configured = False
-            font_family = "Arial"  # Default fallback
-            
-            # Try to use DejaVu fonts if available
-            try:
-                pdf.add_font('DejaVu', '', 'DejaVuSans.ttf', uni=True)
-                pdf.add_font('DejaVu', 'B', 'DejaVuSans-Bold.ttf', uni=True)
-                pdf.add_font('DejaVu', 'I', 'DejaVuSans-Oblique.ttf', uni=True)
-                font_family = 'DejaVu'
-                font_configured = True
-            except:
-                messagebox.showwarning("Font Warning", 
-                    "DejaVu fonts not found. Using Arial which may not support all characters.")
-
-            # Add cover page
-            pdf.add_page()
-            pdf.set_font(font_family, 'B', 20)
-            pdf.cell(0, 40, "Web Scraping Report", 0, 1, 'C')
-            pdf.ln(20)
-            
-            pdf.set_font(font_family, '', 14)
-            pdf.cell(0, 10, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", 0, 1, 'C')
-            pdf.ln(10)
-            
-            pdf.set_font(font_family, 'B', 16)
-            pdf.cell(0, 10, "Scraped URLs:", 0, 1)
-            pdf.set_font(font_family, '', 12)
-            
-            for url in self.url_data:
-                pdf.cell(0, 10, f"- {url}", 0, 1)
-            
-            # Add content for each URL
-            for url, data in self.url_data.items():
-                if data:
-                    pdf.add_page()
-                    pdf.set_font(font_family, 'B', 16)
-                    pdf.cell(0, 10, f"Results from: {url}", 0, 1)
-                    pdf.ln(10)
-                    
-                    pdf.set_font(font_family, '', 12)
-                    
-                    # Clean content and handle special characters
-                    cleaned_content = self.clean_special_chars(data)
-                    
-                    # Split content into lines and add to PDF
-                    for line in cleaned_content.split('\n'):
-                        line = line.strip()
-                        if line:
-                            try:
-                                if (line.upper() == line and len(line) < 50) or line.endswith(':'):
-                                    pdf.set_font(font_family, 'B', 12)
-                                    pdf.cell(0, 10, line, 0, 1)
-                                    pdf.set_font(font_family, '', 12)
-                                elif line.startswith(('http://', 'https://')):
-                                    pdf.set_text_color(0, 0, 255)
-                                    pdf.cell(0, 10, line, 0, 1, link=line)
-                                    pdf.set_text_color(0, 0, 0)
-                                else:
-                                    pdf.multi_cell(0, 10, line)
-                                pdf.ln(2)
-                            except:
-                                # If any error occurs with this line, try ASCII fallback
-                                safe_line = line.encode('ascii', 'ignore').decode('ascii')
-                                pdf.multi_cell(0, 10, safe_line)
-                                pdf.ln(2)
-            
-            # Save PDF
-            pdf.output(file_path)
-            messagebox.showinfo("Success", f"All results exported to {file_path}")
-            self.status_var.set(f"PDF exported to {file_path}")
-
+            export_pdf(url_data, file_path, progress=report_progress)
+            self.queue.put((messagebox.showinfo, ("Success", f"All results exported to {file_path}")))
+            self.queue.put_latest('status', (self.update_status, (f"PDF exported to {file_path}",)))
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to export PDF: {str(e)}")
-
-    def clean_special_chars(self, text):
-        """Replace problematic Unicode characters with ASCII equivalents"""
-        replacements = {
-            '\u2018': "'", '\u2019': "'",  # Curly single quotes
-            '\u201C': '"', '\u201D': '"',   # Curly double quotes
-            '\u2013': '-', '\u2014': '--',  # En/em dashes
-            '\u2026': '...',                # Ellipsis
-            '\u00A0': ' ',                  # Non-breaking space
-            '\u00B0': '°',                  # Degree symbol
-            '\u20AC': 'EUR',                # Euro symbol
-            '\u00A3': 'GBP',                # Pound symbol
-            '\u00A5': 'JPY',                # Yen symbol
-            '\u00A9': '(c)',                # Copyright
-            '\u00AE': '(R)',                # Registered trademark
-        }
-        for uni_char, replacement in replacements.items():
-            text = text.replace(uni_char, replacement)
-        return text
+            self.queue.put((self.show_error, (f"Failed to export PDF: {str(e)}",)))
+        finally:
+            self.queue.put((self.toggle_buttons, (True,)))
+    
+    def on_close(self):
+        """Commit the job store and release connections before the window closes"""
+        if self.job_store is not None:
+            self.job_store.close()
+        if self.change_tracker is not None:
+            self.change_tracker.close()
+        if self.renderer is not None:
+            self.renderer.close()
+        self.scraper.close()
+        self.root.destroy()
     
     def toggle_buttons(self, state):
-        """Enable/disable all buttons"""
-        for child in self.root.winfo_children():
-            if isinstance(child, ttk.Button):
-                child.state(['!disabled' if state else 'disabled'])
+        """Enable/disable all buttons while a fetch or export runs; they sit in nested frames"""
+        widgets = self.root.winfo_children()
+        while widgets:
+            widget = widgets.pop()
+            if isinstance(widget, ttk.Button):
+                widget.state(['!disabled' if state else 'disabled'])
+            else:
+                widgets.extend(widget.winfo_children())
     
     def update_progress(self, value):
         """Update progress bar"""
         self.progress['value'] = value
     
+    def update_timings(self, report):
+        """Replace the Timings tab's contents"""
+        self.timings_text.delete(1.0, tk.END)
+        self.timings_text.insert(tk.END, report)
+    
     def update_results(self, content):
         """Update results display"""
         self.results_text.delete(1.0, tk.END)
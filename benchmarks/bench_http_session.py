@@ -0,0 +1,89 @@
+"""Compare per-call requests.get against the pooled HttpClient.
+
+Starts a local keep-alive HTTP server, fetches the same set of URLs with
+both approaches and reports the number of TCP connections the server
+accepted (one handshake each) and the request latency.
+
+    python benchmarks/bench_http_session.py [requests] [workers]
+"""
+import os
+import socket
+import sys
+import time
+import threading
+import statistics
+import http.server
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from http_session import HttpClient, DEFAULT_HEADERS  # noqa: E402
+
+BODY = b'<html><body>' + b'<p>benchmark page</p>' * 200 + b'</body></html>'
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls on reused connections
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with Handler.lock:
+            Handler.connections += 1
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(label, fetch, urls, workers):
+    Handler.connections = 0
+    latencies = []
+
+    def timed(url):
+        start = time.perf_counter()
+        fetch(url).raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(timed, urls))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{label:<22} connections={Handler.connections:<5} "
+          f"total={elapsed:.3f}s  mean={statistics.mean(latencies) * 1000:.2f}ms  "
+          f"p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:.2f}ms")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/page/{i}" for i in range(count)]
+
+    print(f"{count} requests, {workers} workers, server {base}")
+    run("requests.get per call", lambda url: requests.get(url, headers=DEFAULT_HEADERS, timeout=10), urls, workers)
+
+    client = HttpClient(pool_maxsize=workers)
+    run("pooled HttpClient", client.get, urls, workers)
+    client.close()
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
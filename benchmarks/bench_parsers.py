@@ -0,0 +1,105 @@
+"""Per-page parse + extract time for each installed parser backend.
+
+Runs every scrape mode over a fixed corpus of saved HTML pages. Without
+--corpus a deterministic corpus (small pages, link farms, large tables,
+pages with inline scripts and styles) is generated into benchmarks/corpus/;
+pages missing there are added.
+
+    python benchmarks/bench_parsers.py [--corpus DIR] [--repeat N]
+"""
+import os
+import sys
+import glob
+import time
+import random
+import argparse
+import statistics
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+from parsers import available_backends  # noqa: E402
+from extractors import SCRAPE_MODES, extract  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+
+def generate_corpus(directory, seed=1234):
+    """Write a reproducible set of HTML pages; pages already in the directory are kept"""
+    rng = random.Random(seed)
+    words = ['alpha', 'beta', 'gamma', 'delta', 'scraper', 'table', 'link', 'café', '—', 'data']
+
+    def sentence(n):
+        return ' '.join(rng.choice(words) for _ in range(n))
+
+    pages = {}
+    for i in range(20):
+        body = [f"<h{1 + j % 6}>{sentence(4)}</h{1 + j % 6}><p>{sentence(40)}</p>" for j in range(20)]
+        pages[f"small_{i:02d}.html"] = body
+    for i in range(3):
+        pages[f"links_{i}.html"] = [
+            f'<a href="/page/{rng.randint(0, 5000)}?ref={j}">{sentence(3)}</a> <img src="img/{j}.png" alt="{sentence(2)}">'
+            for j in range(20000)
+        ]
+    for i in range(3):
+        rows = [f"<tr>{''.join(f'<td>{rng.randint(0, 10 ** 6)}</td>' for _ in range(8))}</tr>" for _ in range(15000)]
+        pages[f"table_{i}.html"] = ["<table><tr>" + "<th>col</th>" * 8 + "</tr>"] + rows + ["</table>"]
+    for i in range(3):
+        # Script, style and template contents are not text and must not leak into any mode's results
+        body = ["<style>h1 { color: red; }</style><script>var config = {\"a\": \"<b>x</b>\"};</script>"]
+        for j in range(300):
+            body.append(
+                f"<h{1 + j % 6}>{sentence(3)}<style>.h{j} {{ margin: 0; }}</style></h{1 + j % 6}>"
+                f"<p>{sentence(20)}<script>track({j});</script> {sentence(5)}</p>"
+                f'<a href="/s/{j}">{sentence(2)}<script>document.write("{j}")</script></a>'
+                f"<table><tr><td>{rng.randint(0, 999)}<script>cell({j})</script></td><td>{sentence(2)}</td></tr></table>"
+                f"<template><p>{sentence(4)}</p></template>"
+            )
+        pages[f"scripts_{i}.html"] = body
+
+    os.makedirs(directory, exist_ok=True)
+    for name, body in pages.items():
+        if os.path.exists(os.path.join(directory, name)):
+            continue
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            f.write("<!DOCTYPE html><html><head><title>bench</title></head><body>\n")
+            f.write("\n".join(body))
+            f.write("\n</body></html>\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help="directory of .html files")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per page, best time is kept")
+    args = parser.parse_args()
+
+    if args.corpus == DEFAULT_CORPUS:
+        generate_corpus(DEFAULT_CORPUS)
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(args.corpus, '*.html'))):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            pages.append((os.path.basename(path), f.read()))
+    total_mb = sum(len(html) for _, html in pages) / 1e6
+    print(f"{len(pages)} pages, {total_mb:.1f} MB, modes: {', '.join(SCRAPE_MODES)}")
+
+    modes = list(SCRAPE_MODES)
+    reference = {name: extract(html, 'http://bench.local/', modes, 'html.parser') for name, html in pages}
+
+    for backend in available_backends():
+        times = []
+        mismatches = 0
+        for name, html in pages:
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results = extract(html, 'http://bench.local/', modes, backend)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            times.append(best)
+            mismatches += results != reference[name]
+        print(f"{backend:<12} total={sum(times):.3f}s  mean/page={statistics.mean(times) * 1000:.1f}ms  "
+              f"max/page={max(times) * 1000:.1f}ms  output mismatches vs html.parser={mismatches}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Time PDF export of a large report: legacy per-line layout vs pdf_report.
+
+Builds a synthetic result set (links, headings and paragraphs, 50k lines
+by default) and exports it with both implementations.
+
+    python benchmarks/bench_pdf_export.py [--lines N] [--urls N]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from fpdf import FPDF  # noqa: E402
+from pdf_report import export_pdf, find_fonts  # noqa: E402
+
+LEGACY_REPLACEMENTS = {
+    '‘': "'", '’': "'", '“': '"', '”': '"', '–': '-', '—': '--',
+    '…': '...', ' ': ' ', '°': '°', '€': 'EUR', '£': 'GBP',
+    '¥': 'JPY', '©': '(c)', '®': '(R)',
+}
+
+
+def make_report(lines, urls):
+    """url -> {mode: result} with roughly `lines` lines in total"""
+    per_url = lines // urls
+    url_data = OrderedDict()
+    for u in range(urls):
+        body = []
+        for i in range(per_url):
+            if i % 10 == 0:
+                body.append(f"SECTION {i // 10}:")
+            elif i % 3 == 0:
+                body.append(f"https://example.com/page/{u}/{i}")
+            else:
+                body.append(f"Paragraph {i} — some “quoted” text … priced at €{i}")
+        url_data[f"https://example.com/{u}"] = OrderedDict([("links", "\n".join(body))])
+    return url_data
+
+
+def legacy_export(url_data, file_path):
+    """The pre-rewrite export loop: font setup per export, per-line styling and try/except"""
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    font_family = "Arial"
+    fonts = find_fonts()
+    try:
+        pdf.add_font('DejaVu', '', fonts[''], uni=True)
+        pdf.add_font('DejaVu', 'B', fonts['B'], uni=True)
+        font_family = 'DejaVu'
+    except Exception:
+        pass
+    pdf.add_page()
+    for url, data in url_data.items():
+        pdf.add_page()
+        pdf.set_font(font_family, 'B', 16)
+        pdf.cell(0, 10, f"Results from: {url}", 0, 1)
+        pdf.ln(10)
+        pdf.set_font(font_family, '', 12)
+        content = "\n".join(data.values())
+        for uni_char, replacement in LEGACY_REPLACEMENTS.items():
+            content = content.replace(uni_char, replacement)
+        for line in content.split('\n'):
+            line = line.strip()
+            if line:
+                try:
+                    if (line.upper() == line and len(line) < 50) or line.endswith(':'):
+                        pdf.set_font(font_family, 'B', 12)
+                        pdf.cell(0, 10, line, 0, 1)
+                        pdf.set_font(font_family, '', 12)
+                    elif line.startswith(('http://', 'https://')):
+                        pdf.set_text_color(0, 0, 255)
+                        pdf.cell(0, 10, line, 0, 1, link=line)
+                        pdf.set_text_color(0, 0, 0)
+                    else:
+                        pdf.multi_cell(0, 10, line)
+                    pdf.ln(2)
+                except Exception:
+                    safe_line = line.encode('ascii', 'ignore').decode('ascii')
+                    pdf.multi_cell(0, 10, safe_line)
+                    pdf.ln(2)
+    pdf.output(file_path)
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {elapsed:.2f}s  {os.path.getsize(args[-1]) / 1e6:.1f} MB")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, default=50000, help="lines in the report (default: 50000)")
+    parser.add_argument('--urls', type=int, default=50, help="URLs the lines are spread over (default: 50)")
+    args = parser.parse_args()
+    lines, urls = max(1, args.lines), max(1, args.urls)
+    url_data = make_report(lines, urls)
+    print(f"{lines} lines over {urls} URLs, unicode fonts: {bool(find_fonts())}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        legacy = timed("legacy", legacy_export, url_data, os.path.join(directory, 'legacy.pdf'))
+        current = timed("current", export_pdf, url_data, os.path.join(directory, 'current.pdf'))
+    print(f"speedup    {legacy / current:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
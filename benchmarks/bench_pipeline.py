@@ -0,0 +1,261 @@
+"""End-to-end fetch + extract + export benchmark against a local fixture server.
+
+Serves a generated corpus over loopback: small pages, huge link lists,
+giant tables, slow responders and error responders. The whole pipeline
+(Scraper.fetch_urls with every scrape mode, then an exporter) runs over it
+at several concurrency levels. Each level runs in a fresh process so its
+peak RSS is its own. Throughput, latency percentiles, per-phase totals and
+peak RSS are written to a JSON results file. With --compare, the results
+are set against an earlier results file. No network access is needed.
+
+    python benchmarks/bench_pipeline.py [--concurrency 1 8 32] [--scale 1.0]
+                                        [--output results.json] [--compare baseline.json]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import random
+import platform
+import argparse
+import tempfile
+import threading
+import http.server
+import multiprocessing
+from queue import Empty
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+from extractors import SCRAPE_MODES  # noqa: E402
+from exporters import EXPORTERS, open_exporter  # noqa: E402
+from parsers import available_backends  # noqa: E402
+from metrics import BatchStats  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Pages of each kind at --scale 1.0
+CORPUS_SIZES = {'small': 300, 'links': 6, 'table': 6, 'slow': 20, 'error': 20}
+
+# Delay of the slow responders
+SLOW_SECONDS = 0.25
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_pipeline.json')
+
+
+def generate_corpus(scale=1.0, seed=1234):
+    """path -> (status, body bytes) for a reproducible corpus"""
+    rng = random.Random(seed)
+    words = ['alpha', 'beta', 'gamma', 'delta', 'scraper', 'table', 'link', 'café', '—', 'data']
+
+    def sentence(n):
+        return ' '.join(rng.choice(words) for _ in range(n))
+
+    def page(body):
+        return ("<!DOCTYPE html><html><head><title>bench</title></head><body>\n"
+                + "\n".join(body) + "\n</body></html>\n").encode('utf-8')
+
+    def count(kind):
+        return max(1, round(CORPUS_SIZES[kind] * scale))
+
+    corpus = {}
+    for i in range(count('small')):
+        body = [f"<h{1 + j % 6}>{sentence(4)}</h{1 + j % 6}><p>{sentence(40)}</p>"
+                f'<a href="/small/{rng.randrange(1000)}">{sentence(2)}</a>' for j in range(20)]
+        corpus[f"/small/{i}"] = (200, page(body))
+    for i in range(count('links')):
+        corpus[f"/links/{i}"] = (200, page([
+            f'<a href="/page/{rng.randint(0, 5000)}?ref={j}">{sentence(3)}</a> <img src="img/{j}.png" alt="{sentence(2)}">'
+            for j in range(20000)
+        ]))
+    for i in range(count('table')):
+        rows = [f"<tr>{''.join(f'<td>{rng.randint(0, 10 ** 6)}</td>' for _ in range(8))}</tr>" for _ in range(10000)]
+        corpus[f"/table/{i}"] = (200, page(["<table><tr>" + "<th>col</th>" * 8 + "</tr>"] + rows + ["</table>"]))
+    for i in range(count('slow')):
+        corpus[f"/slow/{i}"] = (200, page([f"<p>{sentence(40)}</p>"]))
+    for i in range(count('error')):
+        corpus[f"/error/{i}"] = (500 if i % 2 else 404, b"error")
+    return corpus
+
+
+class FixtureHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    corpus = {}
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls on reused connections
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path.startswith('/slow/'):
+            time.sleep(SLOW_SECONDS)
+        status, body = self.corpus.get(path, (404, b"not found"))
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server(corpus):
+    FixtureHandler.corpus = corpus
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def peak_rss_bytes(who=None):
+    """Peak resident set size of this process (or its largest finished child), or None where unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF if who is None else who).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # bytes on macOS, KiB elsewhere
+
+
+def run_level(urls, modes, backend, concurrency, export_format, results):
+    """One benchmark run in a child process; puts its numbers on the results queue"""
+    from scraper_core import Scraper
+    from retry_policy import RetryPolicy
+
+    # Every fixture is on one host: no politeness limits, no retries, no cache
+    scraper = Scraper(cache=False, obey_robots=False, host_rate=None, retry_policy=RetryPolicy(max_attempts=1))
+    stats = BatchStats()
+    export_seconds = 0.0
+    with tempfile.TemporaryDirectory() as directory:
+        exporter = open_exporter(export_format, os.path.join(directory, 'out' + EXPORTERS[export_format].extension))
+        try:
+            for url, data, meta in scraper.fetch_urls(urls, modes, backend, concurrency, concurrency):
+                stats.add(url, meta)
+                start = time.perf_counter()
+                exporter.write(url, data, meta)
+                export_seconds += time.perf_counter() - start
+            start = time.perf_counter()
+            exporter.close()
+            export_seconds += time.perf_counter() - start
+        finally:
+            scraper.close()
+
+    summary = stats.summary()
+    results.put({
+        'concurrency': concurrency,
+        'pages': summary['pages'],
+        'failed': summary['failed'],
+        'elapsed_seconds': summary['elapsed_seconds'],
+        'pages_per_second': summary['pages_per_second'],
+        'bytes_per_second': summary['bytes_per_second'],
+        'latency': summary['latency'],
+        'phase_seconds': {phase: values['total'] for phase, values in summary['phases'].items()},
+        'export_seconds': round(export_seconds, 4),
+        'peak_rss_bytes': peak_rss_bytes(),
+        # Largest parse pool worker; large pages are parsed there
+        'peak_rss_parse_worker_bytes': peak_rss_bytes(resource.RUSAGE_CHILDREN) if resource else None,
+    })
+
+
+def run_isolated(urls, modes, backend, concurrency, export_format):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=run_level, args=(urls, modes, backend, concurrency, export_format, results))
+    process.start()
+    while True:
+        alive = process.is_alive()
+        try:
+            result = results.get(timeout=1)
+            break
+        except Empty:
+            # A level that crashed (killed for memory, a native fault) never puts its result
+            if not alive:
+                raise RuntimeError(f"concurrency {concurrency} run died with exit code {process.exitcode}")
+    process.join()
+    return result
+
+
+def compare(current, baseline_path):
+    """Print the change of each level's key numbers against an earlier results file"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {level['concurrency']: level for level in json.load(f)['levels']}
+    print(f"\nChange vs {baseline_path} (positive throughput and negative latency/RSS are better):")
+    for level in current:
+        old = baseline.get(level['concurrency'])
+        if old is None:
+            continue
+        changes = []
+        for label, new_value, old_value in (
+            ('pages/s', level['pages_per_second'], old['pages_per_second']),
+            ('p95', level['latency']['p95'], old['latency']['p95']),
+            ('export', level['export_seconds'], old['export_seconds']),
+            ('peak RSS', level['peak_rss_bytes'], old['peak_rss_bytes']),
+        ):
+            if new_value is not None and old_value:
+                changes.append(f"{label} {(new_value - old_value) / old_value * 100:+.1f}%")
+        print(f"  c={level['concurrency']:<4} " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32], help="levels to run")
+    parser.add_argument('--scale', type=float, default=1.0, help="multiplies the number of pages of each kind")
+    parser.add_argument('--mode', action='append', choices=list(SCRAPE_MODES), dest='modes',
+                        help="scrape modes (default: all)")
+    parser.add_argument('--parser', default='auto', choices=['auto'] + available_backends())
+    parser.add_argument('--format', default='jsonl', choices=list(EXPORTERS), help="export format (default: jsonl)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help="results file (default: benchmarks/bench_pipeline.json)")
+    parser.add_argument('--compare', metavar='FILE', help="earlier results file to compare with")
+    args = parser.parse_args()
+    modes = args.modes or list(SCRAPE_MODES)
+
+    corpus = generate_corpus(args.scale)
+    server, base = start_server(corpus)
+    urls = [base + path for path in corpus]
+    # Interleave kinds so slow and large pages are spread over the run
+    random.Random(1).shuffle(urls)
+    corpus_bytes = sum(len(body) for _, body in corpus.values())
+    print(f"{len(urls)} URLs, {corpus_bytes / 1e6:.1f} MB, modes: {', '.join(modes)}, parser: {args.parser}, "
+          f"export: {args.format}")
+
+    levels = []
+    try:
+        for concurrency in args.concurrency:
+            level = run_isolated(urls, modes, args.parser, max(1, concurrency), args.format)
+            levels.append(level)
+            rss = level['peak_rss_bytes']
+            phases = level['phase_seconds']
+            print(f"c={concurrency:<4} {level['pages_per_second']:8.1f} pages/s  "
+                  f"{level['bytes_per_second'] / 1e6:6.1f} MB/s  "
+                  f"p50={level['latency']['p50'] * 1000:7.1f}ms  p95={level['latency']['p95'] * 1000:7.1f}ms  "
+                  f"parse={phases['parse']:.2f}s extract={phases['extract']:.2f}s export={level['export_seconds']:.2f}s  "
+                  f"peak RSS={'n/a' if rss is None else f'{rss / 1024 / 1024:.0f} MiB'}  failed={level['failed']}")
+    finally:
+        server.shutdown()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'urls': len(urls),
+            'corpus_bytes': corpus_bytes,
+            'scale': args.scale,
+            'modes': modes,
+            'parser': args.parser,
+            'format': args.format,
+            'levels': levels,
+        }, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        compare(levels, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""Change detection between runs over the same URLs.
+
+Every page's body and each mode's extracted result are fingerprinted. A
+page whose body is byte-for-byte the same as last time reuses the stored
+results without being parsed again; a result whose fingerprint changed is
+diffed item by item (links, images, headings, paragraphs, table rows)
+against the stored snapshot, and only the added/removed items are
+recorded and reported.
+"""
+import os
+import json
+import zlib
+import sqlite3
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+
+from exporters import result_rows
+from tables import format_row
+
+DEFAULT_CHANGES_DB = os.path.join(os.path.expanduser('~'), '.webscraper', 'changes.sqlite3')
+
+COMMIT_EVERY = 200
+
+# Page / mode states reported by compare()
+NEW = 'new'
+CHANGED = 'changed'
+UNCHANGED = 'unchanged'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    content_hash TEXT,
+    checked TEXT NOT NULL,
+    changed TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    url TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    result BLOB NOT NULL,
+    PRIMARY KEY (url, mode)
+);
+CREATE TABLE IF NOT EXISTS changes (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    detected TEXT NOT NULL,
+    added TEXT NOT NULL,
+    removed TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS changes_by_url ON changes (url, id);
+"""
+
+
+def fingerprint(data):
+    """Short stable hash of a str or bytes value"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def result_items(mode, result):
+    """The comparable items of a result: lines, paragraphs or table rows"""
+    if mode == "tables":
+        return [format_row(cells) for _, cells in result_rows(mode, result)]
+    return [values[0] for _, values in result_rows(mode, result)]
+
+
+def diff_items(old, new):
+    """(added, removed) items between two item lists, in document order; repeats are counted"""
+    old_counts, new_counts = Counter(old), Counter(new)
+    added_counts, removed_counts = new_counts - old_counts, old_counts - new_counts
+    added, removed = [], []
+    for item in new:
+        if added_counts[item]:
+            added_counts[item] -= 1
+            added.append(item)
+    for item in old:
+        if removed_counts[item]:
+            removed_counts[item] -= 1
+            removed.append(item)
+    return added, removed
+
+
+class ModeChange:
+    """Change of one mode's result: new, changed (with added/removed items) or unchanged"""
+    __slots__ = ('mode', 'status', 'added', 'removed', 'result')
+
+    def __init__(self, mode, status, added=(), removed=(), result=None):
+        self.mode = mode
+        self.status = status
+        self.added = list(added)
+        self.removed = list(removed)
+        self.result = result  # full result, kept for new modes only
+
+
+class PageChanges:
+    """Per-mode changes of one page since the previous run"""
+    __slots__ = ('url', 'status', 'modes')
+
+    def __init__(self, url, modes):
+        self.url = url
+        self.modes = modes
+        statuses = {change.status for change in modes.values()}
+        if statuses <= {UNCHANGED}:
+            self.status = UNCHANGED
+        elif statuses == {NEW}:
+            self.status = NEW
+        else:
+            self.status = CHANGED
+
+    def delta_results(self):
+        """Results holding only what changed: full results for new modes, +/- lines for changed ones"""
+        results = OrderedDict()
+        for mode, change in self.modes.items():
+            if change.status == NEW:
+                results[mode] = change.result
+            elif change.status == CHANGED:
+                results[mode] = "\n".join(
+                    [f"+ {item}" for item in change.added] + [f"- {item}" for item in change.removed]
+                )
+        return results
+
+    def summary(self):
+        """Short description, e.g. 'links +3 -1, tables +2'; modes not seen before are listed as 'images new'"""
+        if self.status != CHANGED:
+            return self.status
+        return ", ".join(
+            f"{mode} +{len(change.added)} -{len(change.removed)}" if change.status == CHANGED else f"{mode} {NEW}"
+            for mode, change in self.modes.items() if change.status != UNCHANGED
+        )
+
+
+class ChangeTracker:
+    """SQLite store of the latest fingerprints and snapshots plus the history of deltas; thread-safe"""
+
+    def __init__(self, path=DEFAULT_CHANGES_DB, commit_every=COMMIT_EVERY):
+        self.commit_every = commit_every
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _write(self, sql, params):
+        self.conn.execute(sql, params)
+        self._writes += 1
+        if self._writes >= self.commit_every:
+            self.conn.commit()
+            self._writes = 0
+
+    def unchanged_results(self, url, content_hash, modes):
+        """Stored results for modes if the page body is identical to the last run's, else None"""
+        if content_hash is None:
+            return None
+        with self._lock:
+            row = self.conn.execute("SELECT content_hash FROM pages WHERE url = ?", (url,)).fetchone()
+            if row is None or row[0] != content_hash:
+                return None
+            stored = dict(self.conn.execute(
+                f"SELECT mode, result FROM snapshots WHERE url = ? AND mode IN ({', '.join('?' * len(modes))})",
+                [url] + list(modes)
+            ).fetchall())
+        if len(stored) != len(modes):
+            return None
+        return OrderedDict((mode, zlib.decompress(stored[mode]).decode('utf-8')) for mode in modes)
+
+    def compare(self, url, results, content_hash=None):
+        """Compare a page's results with the stored snapshot, record the delta and update the snapshot.
+
+        content_hash is the fingerprint of the page body, if known.
+        """
+        now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        changes = OrderedDict()
+        with self._lock:
+            previous = dict(
+                (mode, (fp, blob)) for mode, fp, blob in self.conn.execute(
+                    "SELECT mode, fingerprint, result FROM snapshots WHERE url = ?", (url,)
+                )
+            )
+            for mode, result in results.items():
+                new_fingerprint = fingerprint(result)
+                old = previous.get(mode)
+                if old is not None and old[0] == new_fingerprint:
+                    changes[mode] = ModeChange(mode, UNCHANGED)
+                    continue
+
+                if old is None:
+                    changes[mode] = ModeChange(mode, NEW, result=result)
+                else:
+                    old_result = zlib.decompress(old[1]).decode('utf-8')
+                    added, removed = diff_items(result_items(mode, old_result), result_items(mode, result))
+                    changes[mode] = ModeChange(mode, CHANGED, added, removed)
+                    self._write(
+                        "INSERT INTO changes (url, mode, detected, added, removed) VALUES (?, ?, ?, ?, ?)",
+                        (url, mode, now, json.dumps(added, ensure_ascii=False), json.dumps(removed, ensure_ascii=False))
+                    )
+                self._write(
+                    "INSERT OR REPLACE INTO snapshots (url, mode, fingerprint, result) VALUES (?, ?, ?, ?)",
+                    (url, mode, new_fingerprint, zlib.compress(result.encode('utf-8')))
+                )
+
+            page = PageChanges(url, changes)
+            self._write(
+                "INSERT INTO pages (url, content_hash, checked, changed) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET content_hash = COALESCE(excluded.content_hash, content_hash), "
+                "checked = excluded.checked" + (", changed = excluded.changed" if page.status != UNCHANGED else ""),
+                (url, content_hash, now, now)
+            )
+        return page
+
+    def history(self, url, limit=50):
+        """Most recent recorded deltas of a URL: (detected, mode, added, removed), newest first"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT detected, mode, added, removed FROM changes WHERE url = ? ORDER BY id DESC LIMIT ?",
+                (url, limit)
+            ).fetchall()
+        return [(detected, mode, json.loads(added), json.loads(removed)) for detected, mode, added, removed in rows]
+
+    def flush(self):
+        with self._lock:
+            self.conn.commit()
+            self._writes = 0
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,207 @@
+"""Bounded breadth-first crawl over links discovered while scraping.
+
+The crawl goes level by level: every page at depth d is fetched through
+Scraper.fetch_urls before the links found on them (depth d + 1) are. At
+most max_pages URLs are ever queued, so the frontier and the seen-set
+stay bounded however many links the pages contain.
+"""
+import re
+import math
+import hashlib
+from urllib.parse import urlsplit
+
+from url_utils import normalize_url
+
+# Above this many pages the seen-set switches from a set of strings to a Bloom filter
+BLOOM_MIN_PAGES = 50000
+BLOOM_ERROR_RATE = 0.0001
+
+# Links that are never HTML; skipped without a request
+SKIP_EXTENSIONS = (
+    '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico', '.bmp',
+    '.pdf', '.zip', '.gz', '.tar', '.rar', '.7z', '.exe', '.dmg', '.iso',
+    '.mp3', '.mp4', '.avi', '.mov', '.webm', '.woff', '.woff2', '.ttf',
+    '.css', '.js', '.json', '.xml',
+)
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set of strings.
+
+    Uses one bit array sized for capacity items at the given false positive
+    rate; membership tests may wrongly report an unseen URL as seen, never
+    the other way round.
+    """
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        capacity = max(1, capacity)
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def add(self, item):
+        """Add an item; returns False if it was (probably) already present"""
+        new = False
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                new = True
+        self.count += new
+        return new
+
+    def __len__(self):
+        return self.count
+
+
+class SeenSet:
+    """Exact set of strings with the BloomFilter interface"""
+
+    def __init__(self):
+        self.items = set()
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def add(self, item):
+        if item in self.items:
+            return False
+        self.items.add(item)
+        return True
+
+    def __len__(self):
+        return len(self.items)
+
+
+def make_seen_set(max_pages):
+    """Exact set for ordinary crawls, Bloom filter for very large ones"""
+    if max_pages >= BLOOM_MIN_PAGES:
+        return BloomFilter(max_pages)
+    return SeenSet()
+
+
+class Crawler:
+    """Breadth-first crawler driving a Scraper.
+
+    max_depth is the number of link hops followed from the start URLs
+    (0 fetches only the start URLs) and max_pages caps the number of URLs
+    fetched in total. same_domain keeps the crawl on the start URLs' hosts;
+    include/exclude are regular expressions matched against normalized URLs.
+    Links the scraper's cached robots.txt rules disallow are filtered out
+    as well, so they do not use up max_pages.
+    """
+
+    def __init__(self, scraper, max_depth=2, max_pages=100, same_domain=True, include=None, exclude=None):
+        self.scraper = scraper
+        self.max_depth = max_depth
+        self.max_pages = max(1, max_pages)
+        self.same_domain = same_domain
+        self.include = re.compile(include) if include else None
+        self.exclude = re.compile(exclude) if exclude else None
+        self.seen = None
+        self.hosts = set()
+        self.queued = 0
+        self.fetched = 0
+        self.cached = 0
+        self.skipped = 0
+
+    def allowed(self, url):
+        """Whether a normalized URL passes the domain, extension and pattern filters"""
+        parts = urlsplit(url)
+        if self.same_domain and parts.hostname not in self.hosts:
+            return False
+        if parts.path.lower().endswith(SKIP_EXTENSIONS):
+            return False
+        if self.include is not None and not self.include.search(url):
+            return False
+        if self.exclude is not None and self.exclude.search(url):
+            return False
+        return True
+
+    def blocked(self, url):
+        """Whether robots.txt disallows url; hosts whose rules are not cached yet are checked when fetched"""
+        robots = self.scraper.robots
+        return self.scraper.obey_robots and robots.loaded(url) and not robots.can_fetch(url)
+
+    def enqueue(self, url, frontier):
+        """Normalize, filter and dedupe a discovered URL, adding it to frontier while under max_pages"""
+        if self.queued >= self.max_pages:
+            return False
+        url = normalize_url(url)
+        if url is None or not self.allowed(url) or self.blocked(url):
+            self.skipped += 1
+            return False
+        if not self.seen.add(url):
+            return False
+        frontier.append(url)
+        self.queued += 1
+        return True
+
+    def crawl(self, start_urls, modes, backend='auto', max_workers=8, per_host_limit=2, job=None):
+        """Fetch start_urls and the pages they link to, yielding (url, results, meta).
+
+        meta additionally carries the page's crawl 'depth'. With a job_store
+        Job, discovered URLs are added to the job as they are found and the
+        crawl starts from the job's unfinished URLs, so an interrupted crawl
+        resumes where it stopped; the caller records fetched pages in the job.
+        """
+        self.seen = make_seen_set(self.max_pages)
+        self.hosts = {urlsplit(url).hostname for url in map(normalize_url, start_urls) if url}
+        self.queued = self.fetched = self.cached = self.skipped = 0
+
+        levels = {}  # depth -> URLs still to fetch
+        if job is not None and job.count():
+            # Every URL the job knows is seen; the unfinished ones are the frontier
+            for url, status, meta in job.urls():
+                self.seen.add(normalize_url(url) or url)
+                self.queued += 1
+            for url, depth in job.pending():
+                levels.setdefault(depth, []).append(url)
+        else:
+            # Start URLs are fetched as given and skip the filters; they are only marked seen
+            for url in start_urls:
+                if self.queued < self.max_pages and self.seen.add(normalize_url(url) or url):
+                    levels.setdefault(0, []).append(url)
+                    self.queued += 1
+            if job is not None:
+                job.add_urls(levels.get(0, ()))
+
+        depth = min(levels, default=0)
+        frontier = levels.pop(depth, [])
+        while frontier:
+            discover = depth < self.max_depth and self.queued < self.max_pages
+            next_frontier = levels.pop(depth + 1, [])
+            for url, results, meta in self.scraper.fetch_urls(
+                frontier, modes, backend, max_workers, per_host_limit, discover=discover
+            ):
+                self.fetched += 1
+                self.cached += meta['cached']
+                found = len(next_frontier)
+                for link in meta.pop('links', ()):
+                    if not self.enqueue(link, next_frontier) and self.queued >= self.max_pages:
+                        break
+                if job is not None and len(next_frontier) > found:
+                    job.add_urls(next_frontier[found:], depth + 1)
+                meta['depth'] = depth
+                yield url, results, meta
+            frontier = next_frontier
+            depth += 1
+            if not frontier and levels:
+                # Resumed URLs deeper than anything fetched this run
+                depth = min(levels)
+                frontier = levels.pop(depth)
+
+    def summary(self):
+        """Page counts of the last crawl"""
+        return f"crawl: {self.fetched} pages fetched ({self.cached} unchanged), {self.skipped} links filtered out"
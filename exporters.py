@@ -0,0 +1,215 @@
+"""Streaming result exporters.
+
+Each exporter writes one URL's results as soon as write() is called, so a
+crawl can be exported while it runs without holding every result in memory.
+
+    with open_exporter('csv', 'results.csv') as exporter:
+        for url, results, meta in scraper.fetch_urls(urls, modes):
+            exporter.write(url, results, meta)
+"""
+import sys
+import csv
+import json
+
+from extractors import SCRAPE_MODES
+from tables import parse_tables
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+META_FIELDS = ('status_code', 'fetch_seconds', 'bytes', 'fetched_at')
+
+# Failed URLs are exported as error records with these fields instead of results
+ERROR_FIELDS = ('error_type', 'error', 'attempts')
+
+
+def table_rows(result):
+    """Split a scrape_tables result into (table number, cells) rows"""
+    for table in parse_tables(result):
+        for cells in table.rows:
+            yield table.index, cells
+
+
+def result_rows(mode, result):
+    """One (table, values) row per item of a result; table is None outside tables mode"""
+    if mode == "tables":
+        yield from table_rows(result)
+    elif mode == "text":
+        for paragraph in result.split("\n\n"):
+            if paragraph:
+                yield None, [paragraph]
+    else:
+        for line in result.split("\n"):
+            if line:
+                yield None, [line]
+
+
+class Exporter:
+    """Base class: opens the output file and closes it on exit.
+
+    Subclasses write a URL's results, or its error record when meta['error'] is set.
+    """
+    extension = ''
+    newline = None
+
+    def __init__(self, path):
+        self.path = path
+        # '-' writes to stdout
+        if path == '-':
+            self.file = sys.stdout
+        else:
+            self.file = open(path, 'w', encoding='utf-8', newline=self.newline)
+        self.count = 0
+
+    def write(self, url, results, meta=None):
+        self._write(url, results, meta or {})
+        self.count += 1
+        self.file.flush()
+
+    def _write(self, url, results, meta):
+        raise NotImplementedError
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TxtExporter(Exporter):
+    """Plain text in the layout of the GUI's Export to TXT"""
+    extension = '.txt'
+
+    def _write(self, url, results, meta):
+        self.file.write(f"\n=== Results from {url} ===\n\n")
+        if meta.get('error'):
+            self.file.write(f"Error ({meta.get('error_type')}): {meta['error']}\n\n")
+        for mode, result in results.items():
+            if len(results) > 1:
+                self.file.write(f"--- {SCRAPE_MODES[mode]} ---\n\n")
+            self.file.write(result)
+            self.file.write("\n\n")
+        self.file.write("="*50 + "\n")
+
+
+class JsonlExporter(Exporter):
+    """One JSON object per URL and mode, with fetch metadata"""
+    extension = '.jsonl'
+
+    def _write(self, url, results, meta):
+        if meta.get('error'):
+            record = {'url': url, 'mode': None}
+            record.update((field, meta.get(field)) for field in META_FIELDS + ERROR_FIELDS)
+            self.file.write(json.dumps(record, ensure_ascii=False))
+            self.file.write("\n")
+        for mode, result in results.items():
+            record = {'url': url, 'mode': mode}
+            record.update((field, meta.get(field)) for field in META_FIELDS)
+            record['result'] = result
+            self.file.write(json.dumps(record, ensure_ascii=False))
+            self.file.write("\n")
+
+
+class CsvExporter(Exporter):
+    """One CSV row per extracted item; table rows spread their cells over value columns.
+
+    A failed URL gets one row with an empty mode and the error columns filled.
+    """
+    extension = '.csv'
+    newline = ''
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(('url', 'mode') + META_FIELDS + ERROR_FIELDS + ('table', 'value'))
+
+    def _write(self, url, results, meta):
+        prefix = [url]
+        meta_values = [meta.get(field) for field in META_FIELDS]
+        if meta.get('error'):
+            self.writer.writerow(prefix + [''] + meta_values + [meta.get(field) for field in ERROR_FIELDS])
+        no_error = [None] * len(ERROR_FIELDS)
+        for mode, result in results.items():
+            for table, values in result_rows(mode, result):
+                self.writer.writerow(prefix + [mode] + meta_values + no_error + [table] + values)
+
+
+class ParquetExporter(Exporter):
+    """Parquet file written in row groups (requires pyarrow)"""
+    extension = '.parquet'
+    batch_rows = 10000
+
+    def __init__(self, path):
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+        self.path = path
+        self.count = 0
+        self.schema = pyarrow.schema([
+            ('url', pyarrow.string()),
+            ('mode', pyarrow.string()),
+            ('status_code', pyarrow.int32()),
+            ('fetch_seconds', pyarrow.float64()),
+            ('bytes', pyarrow.int64()),
+            ('fetched_at', pyarrow.string()),
+            ('error_type', pyarrow.string()),
+            ('error', pyarrow.string()),
+            ('attempts', pyarrow.int32()),
+            ('table', pyarrow.int32()),
+            ('values', pyarrow.list_(pyarrow.string())),
+        ])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+        self.rows = []
+
+    def write(self, url, results, meta=None):
+        meta = meta or {}
+        if meta.get('error'):
+            row = {'url': url, 'mode': None, 'table': None, 'values': None}
+            row.update((field, meta.get(field)) for field in META_FIELDS + ERROR_FIELDS)
+            self.rows.append(row)
+        for mode, result in results.items():
+            for table, values in result_rows(mode, result):
+                row = {'url': url, 'mode': mode, 'table': table, 'values': values}
+                row.update((field, meta.get(field)) for field in META_FIELDS)
+                self.rows.append(row)
+        if len(self.rows) >= self.batch_rows:
+            self._flush_rows()
+        self.count += 1
+
+    def _flush_rows(self):
+        if self.rows:
+            self.writer.write_table(pyarrow.Table.from_pylist(self.rows, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        self._flush_rows()
+        self.writer.close()
+
+
+EXPORTERS = {
+    'txt': TxtExporter,
+    'jsonl': JsonlExporter,
+    'csv': CsvExporter,
+}
+if PARQUET_AVAILABLE:
+    EXPORTERS['parquet'] = ParquetExporter
+
+
+def format_for_path(path, default='txt'):
+    """Exporter format implied by a file extension"""
+    for name, exporter in EXPORTERS.items():
+        if path.lower().endswith(exporter.extension):
+            return name
+    return default
+
+
+def open_exporter(format, path):
+    """Create the exporter for a format name"""
+    return EXPORTERS[format](path)
@@ -0,0 +1,233 @@
+"""Content extractors shared by every scrape mode.
+
+Extractors take a parsed document from any parsers backend. Module-level
+functions keep extraction picklable so it can run in a process pool.
+"""
+import time
+import codecs
+from collections import OrderedDict
+from html.parser import HTMLParser
+
+from parsers import get_backend, NON_TEXT_TAGS
+from link_index import PageLinks, image_sources
+from tables import TableBuilder, read_tables, replay_tables, format_tables, format_row
+
+# Scrape modes in display order
+SCRAPE_MODES = OrderedDict([
+    ("text", "Text Content"),
+    ("links", "All Links"),
+    ("images", "Images"),
+    ("headings", "Headings"),
+    ("tables", "Tables")
+])
+
+# Tags each extractor looks at, used to collect everything in one walk of the document
+MODE_TAGS = {
+    "text": ('p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'),
+    "links": ('a',),
+    "images": ('img',),
+    "headings": ('h1', 'h2', 'h3', 'h4', 'h5', 'h6'),
+    "tables": ('table',)
+}
+
+# Modes that StreamingExtractor can produce without building a document tree
+STREAMABLE_MODES = ("links", "images", "tables")
+
+# Result key holding absolute hrefs when link discovery is requested (used by crawl mode)
+DISCOVERED_LINKS = "_links"
+
+
+class TagIndex:
+    """Tags gathered in a single walk of the document.
+
+    Supports the subset of BeautifulSoup.find_all used by the extractors, so
+    several extractors can share one traversal instead of each walking the tree.
+    """
+
+    def __init__(self, soup, names):
+        self.tags = soup.find_all(list(names))
+
+    def find_all(self, name, **attrs):
+        names = (name,) if isinstance(name, str) else tuple(name)
+        required = [attr for attr, value in attrs.items() if value is True]
+        return [
+            tag for tag in self.tags
+            if tag.name in names and all(tag.get(attr) is not None for attr in required)
+        ]
+
+
+def scrape_text_content(soup):
+    """Scrape all text content from paragraphs and headings"""
+    paragraphs = [p.get_text().strip() for p in soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])]
+    paragraphs = [p for p in paragraphs if p]  # Remove empty strings
+    return "\n\n".join(paragraphs)
+
+
+def scrape_links(soup, base_url):
+    """Scrape all links from the page, each normalized URL once"""
+    links = PageLinks(base_url)
+    for a in soup.find_all('a', href=True):
+        links.add(a['href'], a.get_text().strip())
+    return "\n".join(links.link_lines())
+
+
+def scrape_images(soup, base_url):
+    """Scrape all images from the page (src, srcset and lazy-load sources), each normalized URL once"""
+    images = PageLinks(base_url)
+    for img in soup.find_all('img'):
+        alt_text = img.get('alt')
+        for src in image_sources(img.get):
+            images.add(src, alt_text)
+    return "\n".join(images.image_lines())
+
+
+def discover_links(soup, base_url):
+    """Normalized URLs of the page's <a href>s in document order, without repeats"""
+    links = PageLinks(base_url)
+    for a in soup.find_all('a', href=True):
+        links.add(a['href'])
+    return list(links.texts)
+
+
+def scrape_headings(soup):
+    """Scrape all headings from the page"""
+    headings = []
+    for level in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
+        for heading in soup.find_all(level):
+            text = heading.get_text().strip()
+            if text:
+                headings.append(f"{level.upper()}: {text}")
+    return "\n".join(headings)
+
+
+def scrape_tables(soup):
+    """Scrape all tables from the page; see tables.py for spans and nesting"""
+    return format_tables(read_tables(soup.find_all('table')))
+
+
+class StreamingExtractor(HTMLParser):
+    """Incremental links/images/tables extractor fed with raw body chunks.
+
+    Only the current anchor's text and the current table row are buffered,
+    so memory stays bounded by the size of the results no matter how large
+    the page is. Output matches scrape_links/scrape_images/scrape_tables.
+    """
+
+    def __init__(self, base_url, encoding, modes=STREAMABLE_MODES):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self.links = PageLinks(base_url)
+        self.images = PageLinks(base_url)
+        self._anchors = []  # (href, text parts) for open <a> tags
+        self._non_text = 0  # depth inside <script>/<style>/<template>, whose data is not text
+        self.table_lines = {}  # table number -> formatted rows
+        self.tables = TableBuilder(self._add_table_row, keep_rows=False) if "tables" in modes else None
+
+    def feed_bytes(self, chunk):
+        self.feed(self.decoder.decode(chunk))
+
+    def handle_starttag(self, tag, attrs):
+        if tag in NON_TEXT_TAGS:
+            self._non_text += 1
+        if self.tables is not None:
+            self.tables.start(tag, attrs)
+        if tag == 'a':
+            href = self._attr(attrs, 'href')
+            if href is not None:
+                self.links.add(href)  # takes the link's place in document order; its text comes at </a>
+                self._anchors.append((href, []))
+        elif tag == 'img':
+            attrs = dict(attrs)
+            alt_text = self._attr(attrs.items(), 'alt')
+            for src in image_sources(attrs.get):
+                self.images.add(src, alt_text)
+
+    def handle_endtag(self, tag):
+        if tag in NON_TEXT_TAGS and self._non_text:
+            self._non_text -= 1
+        if self.tables is not None:
+            self.tables.end(tag)
+        if tag == 'a' and self._anchors:
+            self._close_anchor()
+
+    def handle_data(self, data):
+        if self._non_text:
+            return
+        if self.tables is not None:
+            self.tables.data(data)
+        for _, parts in self._anchors:
+            parts.append(data)
+
+    def _add_table_row(self, table, cells):
+        self.table_lines.setdefault(table.index, []).append(format_row(cells))
+
+    def _attr(self, attrs, name):
+        for key, value in attrs:
+            if key == name:
+                return '' if value is None else value
+        return None
+
+    def _close_anchor(self):
+        href, parts = self._anchors.pop()
+        self.links.add(href, ''.join(parts).strip())
+
+    def results(self, modes, discover=False):
+        """Finish parsing and return results for the requested modes"""
+        self.feed(self.decoder.decode(b'', final=True))
+        self.close()
+        while self._anchors:
+            self._close_anchor()
+
+        results = OrderedDict()
+        for mode in modes:
+            if mode == "tables":
+                results[mode] = format_tables(self.tables.close(), self.table_lines)
+            else:
+                results[mode] = "\n".join(self.links.link_lines() if mode == "links" else self.images.image_lines())
+        if discover:
+            results[DISCOVERED_LINKS] = list(self.links.texts)
+        return results
+
+
+def extract(html, url, modes, backend='auto', discover=False):
+    """Parse a page once and run the extractors for all requested modes.
+
+    With discover=True the results also hold the page's absolute link
+    targets under DISCOVERED_LINKS.
+    """
+    return extract_timed(html, url, modes, backend, discover)[0]
+
+
+def extract_timed(html, url, modes, backend='auto', discover=False):
+    """extract() returning (results, parse seconds, extract seconds); picklable for the parse pool"""
+    start = time.perf_counter()
+    parser = get_backend(backend)
+    soup = parser.parse(html)
+    parsed = time.perf_counter()
+    names = set().union(*(MODE_TAGS[mode] for mode in modes))
+    if discover:
+        names.add('a')
+    index = TagIndex(soup, names)
+
+    results = OrderedDict()
+    for mode in modes:
+        if mode == "text":
+            results[mode] = scrape_text_content(index)
+        elif mode == "links":
+            results[mode] = scrape_links(index, url)
+        elif mode == "images":
+            results[mode] = scrape_images(index, url)
+        elif mode == "headings":
+            results[mode] = scrape_headings(index)
+        elif mode == "tables":
+            if parser.closes_implied_tags:
+                results[mode] = scrape_tables(index)
+            else:
+                # The tree leaves omitted </td>/</tr> open; its table subtrees are replayed as tag events
+                results[mode] = format_tables(replay_tables(index.find_all('table')))
+        else:
+            results[mode] = "Invalid scrape type"
+    if discover:
+        results[DISCOVERED_LINKS] = discover_links(index, url)
+    return results, parsed - start, time.perf_counter() - parsed
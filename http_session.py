@@ -0,0 +1,258 @@
+import time
+import socket
+import threading
+from contextlib import contextmanager
+import requests
+from requests.adapters import HTTPAdapter
+from requests.compat import chardet
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError, ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
+
+from metrics import DNS, CONNECT, TLS, current_timings
+
+# Optional HTTP/2 support through httpx (pip install httpx[http2])
+try:
+    import httpx
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Brotli decoding is handled transparently by urllib3/httpx when a brotli module is installed
+try:
+    import brotli  # noqa: F401
+    BROTLI_AVAILABLE = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        BROTLI_AVAILABLE = True
+    except ImportError:
+        BROTLI_AVAILABLE = False
+
+# Product token matched against robots.txt User-agent lines; also sent in the User-Agent header
+USER_AGENT_TOKEN = 'WebScraperApp'
+
+DEFAULT_HEADERS = {
+    'User-Agent': f'Mozilla/5.0 (compatible; {USER_AGENT_TOKEN}/1.0)',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br' if BROTLI_AVAILABLE else 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+# Largest body read for one page; bigger responses are cut off
+DEFAULT_MAX_BODY_BYTES = 10 * 1024 * 1024
+
+CHUNK_SIZE = 64 * 1024
+
+# Content types worth downloading and parsing
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain', 'text/xml', 'application/xml')
+
+
+class ResponseTooLarge(Exception):
+    """Raised when a response body exceeds the configured maximum size"""
+
+
+class UnsupportedContentType(Exception):
+    """Raised when a response is not an HTML/text document"""
+
+
+class StreamedResponse:
+    """Response whose body has not been read yet.
+
+    Wraps a streaming requests or httpx response with a common interface;
+    the body is only pulled in chunks through iter_bytes().
+    """
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        # requests exposes .encoding, httpx .charset_encoding
+        self.encoding = response.encoding if hasattr(response, 'iter_content') else response.charset_encoding
+
+    def raise_for_status(self):
+        self._response.raise_for_status()
+
+    @property
+    def content_type(self):
+        return self.headers.get('Content-Type', '').split(';')[0].strip().lower()
+
+    @property
+    def content_length(self):
+        """Declared body size, or None when unknown (e.g. chunked)"""
+        try:
+            return int(self.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return None
+
+    def check_content_type(self):
+        """Reject non-document responses before any of the body is read"""
+        if self.content_type and self.content_type not in HTML_CONTENT_TYPES:
+            raise UnsupportedContentType(f"Unsupported content type: {self.content_type}")
+
+    def iter_bytes(self, chunk_size=CHUNK_SIZE):
+        """Yield the decompressed body in chunks"""
+        if hasattr(self._response, 'iter_content'):
+            return self._response.iter_content(chunk_size)
+        return self._response.iter_bytes(chunk_size)
+
+
+def detect_encoding(response, sample):
+    """Encoding to decode a body with, the same way requests' Response.text picks it"""
+    return response.encoding or chardet.detect(sample)['encoding'] or 'utf-8'
+
+
+def decode_body(body, encoding):
+    """Decode body bytes, replacing undecodable bytes like Response.text does"""
+    try:
+        return str(body, encoding, errors='replace')
+    except LookupError:
+        return str(body, 'utf-8', errors='replace')
+
+
+class TimedConnectionMixin:
+    """urllib3 connection that adds DNS, TCP connect and TLS times to the current PhaseTimings.
+
+    The host is resolved here so the lookup can be timed on its own; the
+    connection is then made to each resolved address in turn, like
+    urllib3 does itself.
+    """
+
+    def _new_conn(self):
+        timings = current_timings()
+        if timings is None:
+            return super()._new_conn()
+
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            infos = socket.getaddrinfo(host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+            addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        except OSError:
+            addresses = [host]  # urllib3 repeats the lookup and raises its usual error
+        resolved = time.perf_counter()
+        timings.add(DNS, resolved - start)
+        try:
+            for index, address in enumerate(addresses):
+                # Only the socket connect uses _dns_host; it is restored before the TLS handshake
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except (NewConnectionError, ConnectTimeoutError):
+                    if index == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = host
+            timings.add(CONNECT, time.perf_counter() - resolved)
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+
+    def connect(self):
+        timings = current_timings()
+        if timings is None:
+            return super().connect()
+        start = time.perf_counter()
+        before = timings.connection_seconds()
+        super().connect()
+        # Whatever connect() spent beyond DNS and the TCP connect was the TLS handshake
+        timings.add(TLS, time.perf_counter() - start - (timings.connection_seconds() - before))
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose new connections report their setup times (see metrics.PhaseTimings)"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+
+class HttpClient:
+    """Shared, pooled HTTP client reused across all fetches.
+
+    Connections (and their TLS sessions) are kept alive and reused per host,
+    so repeated requests to the same domain skip the TCP/TLS handshake.
+    Over HTTP/1.1 the setup time of new connections is reported to
+    metrics.current_timings(); the HTTP/2 client leaves it in the TTFB.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, headers=None, http2=False, timeout=10):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.headers = dict(DEFAULT_HEADERS)
+        if headers:
+            self.headers.update(headers)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._lock = threading.Lock()
+        self._client = None
+
+    def _create_client(self):
+        """Build the underlying requests.Session or httpx.Client"""
+        if self.http2:
+            limits = httpx.Limits(
+                max_connections=self.pool_connections * self.pool_maxsize,
+                max_keepalive_connections=self.pool_connections * self.pool_maxsize
+            )
+            return httpx.Client(http2=True, headers=self.headers, limits=limits,
+                                timeout=self.timeout, follow_redirects=True)
+        
+        session = requests.Session()
+        session.headers.update(self.headers)
+        adapter = TimedHTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    @property
+    def client(self):
+        """Lazily create the shared client on first use"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        return self._client
+
+    def get(self, url, headers=None, timeout=None):
+        """GET a URL over the shared connection pool"""
+        return self.client.get(url, headers=headers, timeout=timeout or self.timeout)
+
+    @contextmanager
+    def open(self, url, headers=None, timeout=None):
+        """GET a URL without reading the body; yields a StreamedResponse"""
+        timeout = timeout or self.timeout
+        if self.http2:
+            with self.client.stream('GET', url, headers=headers, timeout=timeout) as response:
+                yield StreamedResponse(response)
+        else:
+            response = self.client.get(url, headers=headers, timeout=timeout, stream=True)
+            try:
+                yield StreamedResponse(response)
+            finally:
+                response.close()
+
+    def close(self):
+        """Close all pooled connections"""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
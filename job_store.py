@@ -0,0 +1,314 @@
+"""Persistent job store: per-URL status, results, timings and errors in SQLite.
+
+A job is a list of URLs fetched with a fixed set of scrape modes. Every
+completed URL is recorded as it finishes, so a job interrupted by a crash
+or a closed window can be reopened and only its unfinished URLs fetched:
+those never fetched and those whose failure is worth retrying (a timeout,
+say, but not a robots.txt block or a 404).
+Results live in the database rather than in memory and are read back one
+URL (or one page of URLs) at a time.
+
+The database runs in WAL mode so the GUI can read while the fetch thread
+writes. Writes are buffered and committed in batches of COMMIT_EVERY rows
+or every COMMIT_INTERVAL seconds, whichever comes first.
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from retry_policy import RETRYABLE
+
+DEFAULT_JOB_DB = os.path.join(os.path.expanduser('~'), '.webscraper', 'jobs.sqlite3')
+
+COMMIT_EVERY = 200
+COMMIT_INTERVAL = 2.0
+
+# URL states
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+# Fetch metadata columns of the urls table
+META_COLUMNS = ('status_code', 'bytes', 'fetch_seconds', 'fetched_at', 'cached', 'attempts', 'error_type', 'error')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    modes TEXT NOT NULL,
+    created TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS urls (
+    job_id INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    depth INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    retryable INTEGER,
+    status_code INTEGER,
+    bytes INTEGER,
+    fetch_seconds REAL,
+    fetched_at TEXT,
+    cached INTEGER,
+    attempts INTEGER,
+    error_type TEXT,
+    error TEXT,
+    PRIMARY KEY (job_id, url)
+);
+CREATE INDEX IF NOT EXISTS urls_by_position ON urls (job_id, position);
+CREATE TABLE IF NOT EXISTS results (
+    job_id INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (job_id, url, mode)
+);
+"""
+
+
+class JobStore:
+    """SQLite database of jobs; one connection shared by all threads behind a lock"""
+
+    def __init__(self, path=DEFAULT_JOB_DB, commit_every=COMMIT_EVERY, commit_interval=COMMIT_INTERVAL):
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        if 'retryable' not in [row[1] for row in self.conn.execute("PRAGMA table_info(urls)")]:
+            # Databases from before failures were told apart: classify the stored ones by their type
+            self.conn.execute("ALTER TABLE urls ADD COLUMN retryable INTEGER")
+            self.conn.execute(
+                f"UPDATE urls SET retryable = error_type IN ({', '.join('?' * len(RETRYABLE))}) WHERE status = ?",
+                RETRYABLE + (FAILED,)
+            )
+        self.conn.commit()
+
+        self._lock = threading.RLock()
+        # Buffered writes, applied in this order: new URLs, URL updates, result deletes, result inserts
+        self._new_urls = []
+        self._url_updates = []
+        self._result_deletes = []
+        self._result_rows = []
+        self._buffered = 0
+        self._last_commit = time.monotonic()
+
+    def create_job(self, urls, modes, name=None):
+        """Start a new job for urls"""
+        with self._lock:
+            cursor = self.conn.execute(
+                "INSERT INTO jobs (name, modes, created) VALUES (?, ?, ?)",
+                (name, json.dumps(list(modes)), datetime.now(timezone.utc).isoformat(timespec='seconds'))
+            )
+            self.conn.commit()
+            job = Job(self, cursor.lastrowid, name, list(modes))
+        job.add_urls(urls)
+        return job
+
+    def get_job(self, job_id):
+        """Job by id, or None"""
+        with self._lock:
+            row = self.conn.execute("SELECT id, name, modes FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job(self, row[0], row[1], json.loads(row[2])) if row else None
+
+    def find_job(self, name):
+        """Most recent job with this name, or None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT id FROM jobs WHERE name = ? ORDER BY id DESC LIMIT 1", (name,)
+            ).fetchone()
+        return self.get_job(row[0]) if row else None
+
+    def latest_job(self):
+        """Most recently created job, or None"""
+        with self._lock:
+            row = self.conn.execute("SELECT MAX(id) FROM jobs").fetchone()
+        return self.get_job(row[0]) if row and row[0] is not None else None
+
+    def open_job(self, name, urls, modes):
+        """Resume the named job if it used the same modes, otherwise start it afresh"""
+        job = self.find_job(name)
+        if job is None or job.modes != list(modes):
+            return self.create_job(urls, modes, name)
+        job.add_urls(urls)
+        return job
+
+    def jobs(self):
+        """(id, name, created, total URLs, finished URLs) of every job, newest first"""
+        with self._lock:
+            self._write_buffered()
+            return self.conn.execute(
+                "SELECT jobs.id, jobs.name, jobs.created, COUNT(urls.url), "
+                "COALESCE(SUM(urls.status != 'pending'), 0) "
+                "FROM jobs LEFT JOIN urls ON urls.job_id = jobs.id GROUP BY jobs.id ORDER BY jobs.id DESC"
+            ).fetchall()
+
+    def delete_job(self, job_id):
+        with self._lock:
+            self._write_buffered()
+            for table, column in (('results', 'job_id'), ('urls', 'job_id'), ('jobs', 'id')):
+                self.conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (job_id,))
+            self.conn.commit()
+
+    def _buffer(self, count):
+        """Account for buffered rows and commit once a batch is full or old enough"""
+        self._buffered += count
+        if self._buffered >= self.commit_every or time.monotonic() - self._last_commit >= self.commit_interval:
+            self.flush()
+
+    def _write_buffered(self):
+        """Apply buffered writes without committing, so reads on this connection see them"""
+        if self._new_urls:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO urls (job_id, url, position, depth) VALUES (?, ?, ?, ?)", self._new_urls
+            )
+            self._new_urls = []
+        if self._url_updates:
+            columns = ('job_id', 'url', 'position', 'depth', 'status', 'retryable') + META_COLUMNS
+            self.conn.executemany(
+                f"INSERT INTO urls ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                "ON CONFLICT (job_id, url) DO UPDATE SET " +
+                ", ".join(f"{column} = excluded.{column}" for column in ('status', 'retryable') + META_COLUMNS),
+                self._url_updates
+            )
+            self._url_updates = []
+        if self._result_deletes:
+            self.conn.executemany("DELETE FROM results WHERE job_id = ? AND url = ?", self._result_deletes)
+            self._result_deletes = []
+        if self._result_rows:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO results (job_id, url, mode, result) VALUES (?, ?, ?, ?)", self._result_rows
+            )
+            self._result_rows = []
+
+    def flush(self):
+        """Write and commit everything buffered"""
+        with self._lock:
+            self._write_buffered()
+            self.conn.commit()
+            self._buffered = 0
+            self._last_commit = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self.conn.close()
+
+
+class Job:
+    """One job in a JobStore: its URLs, their status and their results"""
+
+    def __init__(self, store, job_id, name, modes):
+        self.store = store
+        self.id = job_id
+        self.name = name
+        self.modes = modes
+        with store._lock:
+            store._write_buffered()
+            row = store.conn.execute("SELECT MAX(position) FROM urls WHERE job_id = ?", (job_id,)).fetchone()
+        self._next_position = 0 if row[0] is None else row[0] + 1
+
+    def add_urls(self, urls, depth=0):
+        """Add URLs as pending; URLs already in the job keep their state"""
+        store = self.store
+        with store._lock:
+            added = 0
+            for url in urls:
+                store._new_urls.append((self.id, url, self._next_position, depth))
+                self._next_position += 1
+                added += 1
+            store._buffer(added)
+
+    def set_modes(self, modes):
+        """Change the scrape modes used for further fetches of this job"""
+        self.modes = list(modes)
+        with self.store._lock:
+            self.store.conn.execute("UPDATE jobs SET modes = ? WHERE id = ?", (json.dumps(self.modes), self.id))
+            self.store.conn.commit()
+
+    def record(self, url, results, meta):
+        """Store a fetched URL's results and metadata, replacing any earlier ones"""
+        store = self.store
+        status = FAILED if meta.get('error') else DONE
+        retryable = meta.get('error_type') in RETRYABLE if status == FAILED else None
+        with store._lock:
+            store._url_updates.append(
+                (self.id, url, self._next_position, meta.get('depth', 0), status, retryable) +
+                tuple(meta.get(column) for column in META_COLUMNS)
+            )
+            self._next_position += 1
+            # Deletes are applied before inserts, so drop results of an earlier fetch still in the buffer
+            if any(row[1] == url for row in store._result_rows):
+                store._result_rows = [row for row in store._result_rows if row[1] != url or row[0] != self.id]
+            store._result_deletes.append((self.id, url))
+            store._result_rows.extend((self.id, url, mode, result) for mode, result in results.items())
+            store._buffer(1 + len(results))
+
+    def _query(self, sql, params=()):
+        with self.store._lock:
+            self.store._write_buffered()
+            return self.store.conn.execute(sql, params).fetchall()
+
+    def pending(self):
+        """(url, depth) of every URL still to fetch, in job order: never fetched, or failed in a retryable way"""
+        return self._query(
+            "SELECT url, depth FROM urls WHERE job_id = ? AND (status = ? OR status = ? AND retryable) "
+            "ORDER BY position", (self.id, PENDING, FAILED)
+        )
+
+    def count(self, status=None):
+        """Number of URLs in the job, or in one state"""
+        if status is None:
+            return self._query("SELECT COUNT(*) FROM urls WHERE job_id = ?", (self.id,))[0][0]
+        return self._query("SELECT COUNT(*) FROM urls WHERE job_id = ? AND status = ?", (self.id, status))[0][0]
+
+    def urls(self, offset=0, limit=-1):
+        """A page of (url, status, meta) rows in job order; meta includes the crawl depth"""
+        rows = self._query(
+            "SELECT url, status, depth, " + ", ".join(META_COLUMNS) +
+            " FROM urls WHERE job_id = ? ORDER BY position LIMIT ? OFFSET ?",
+            (self.id, limit, offset)
+        )
+        return [(row[0], row[1], _meta(row[2:])) for row in rows]
+
+    def results(self, url):
+        """Stored results of one URL, in the job's mode order (empty if not fetched or failed)"""
+        rows = OrderedDict(self._query("SELECT mode, result FROM results WHERE job_id = ? AND url = ?", (self.id, url)))
+        results = OrderedDict((mode, rows.pop(mode)) for mode in self.modes if mode in rows)
+        results.update(rows)
+        return results
+
+    def meta(self, url):
+        """Stored fetch metadata of one URL, or None if it is not in the job"""
+        rows = self._query(
+            "SELECT depth, " + ", ".join(META_COLUMNS) + " FROM urls WHERE job_id = ? AND url = ?", (self.id, url)
+        )
+        return _meta(rows[0]) if rows else None
+
+    def iter_results(self, batch=500):
+        """Yield (url, results, meta) for every fetched URL, reading batch URLs at a time"""
+        offset = 0
+        while True:
+            rows = self.urls(offset, batch)
+            if not rows:
+                return
+            for url, status, meta in rows:
+                if status != PENDING:
+                    yield url, self.results(url), meta
+            offset += batch
+
+
+def _meta(row):
+    """Metadata dict from a (depth,) + META_COLUMNS row"""
+    meta = dict(zip(('depth',) + META_COLUMNS, row))
+    meta['cached'] = bool(meta['cached'])
+    return meta
@@ -0,0 +1,259 @@
+"""Normalized, deduplicated links and images.
+
+Extractors resolve every href/src through a PageLinks, so a page's links
+and images results list each normalized URL once, in order of first
+appearance, with its first non-empty text. URLs are made absolute, then
+scheme/host case, default ports, fragments and tracking parameters are
+normalized away (see url_utils.normalize_url). A LinkIndex collects those
+results over a whole batch: one compact record per unique URL with the
+pages that reference it, queryable by domain.
+"""
+import sys
+import csv
+import threading
+from collections import Counter
+from urllib.parse import urljoin, urlsplit
+
+from url_utils import normalize_url, strip_tracking
+
+LINK = 'link'
+IMAGE = 'image'
+
+# Result mode -> kind of the URLs it lists
+KINDS = {'links': LINK, 'images': IMAGE}
+
+NO_ALT_TEXT = 'No alt text'
+
+# <img> attributes of lazy-loading scripts, looked at besides src and srcset
+LAZY_SRC_ATTRS = ('data-src', 'data-lazy-src', 'data-original')
+LAZY_SRCSET_ATTRS = ('data-srcset', 'data-lazy-srcset')
+
+SRCSET_SPACE = ' \t\n\r\f'
+
+# Line prefixes of change-detection deltas (see change_tracker.PageChanges.delta_results)
+DELTA_ADDED = '+ '
+DELTA_REMOVED = '- '
+
+INDEX_FIELDS = ('kind', 'url', 'host', 'pages', 'first_page', 'text')
+
+
+def absolute_url(base_url, href):
+    """Absolute, normalized form of an href or src; spaces are encoded, so the URL never contains one"""
+    href = href.strip()
+    if not href.startswith(('http://', 'https://')):
+        href = urljoin(base_url, href)
+    return (normalize_url(href, drop_tracking=True) or href).replace(' ', '%20')
+
+
+def srcset_urls(srcset):
+    """Candidate URLs of a srcset attribute, without their width/density descriptors"""
+    urls = []
+    position, length = 0, len(srcset)
+    while position < length:
+        while position < length and (srcset[position] in SRCSET_SPACE or srcset[position] == ','):
+            position += 1
+        start = position
+        while position < length and srcset[position] not in SRCSET_SPACE:
+            position += 1
+        url = srcset[start:position]
+        if url.endswith(','):
+            url = url.rstrip(',')
+        else:
+            # Skip the descriptors up to the next candidate
+            comma = srcset.find(',', position)
+            position = length if comma < 0 else comma + 1
+        if url:
+            urls.append(url)
+    return urls
+
+
+def image_sources(get):
+    """Source URLs of an <img> as written: src, lazy-load data-src, then every srcset candidate.
+
+    get(attr) returns an attribute value or None. Inline data: URIs
+    (typically lazy-load placeholders) are left out.
+    """
+    sources = []
+    for attr in ('src',) + LAZY_SRC_ATTRS:
+        value = get(attr)
+        if value and value.strip():
+            sources.append(value)
+    for attr in ('srcset',) + LAZY_SRCSET_ATTRS:
+        value = get(attr)
+        if value:
+            sources.extend(srcset_urls(value))
+    return [source for source in sources if not source.lstrip().lower().startswith('data:')]
+
+
+class PageLinks:
+    """One page's links or images: normalized, deduplicated, in order of first appearance"""
+    __slots__ = ('base_url', 'texts', '_resolved', '_origin', '_directory')
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.texts = {}  # url -> first non-empty text (alt text for images, None when absent)
+        self._resolved = {}  # href as written -> url; link farms repeat the same hrefs
+        base = normalize_url(base_url)
+        if base is None:
+            self._origin = self._directory = None
+        else:
+            parts = urlsplit(base)
+            self._origin = f"{parts.scheme}://{parts.netloc}"
+            self._directory = self._origin + parts.path[:parts.path.rfind('/') + 1]
+
+    def resolve(self, href):
+        url = self._resolved.get(href)
+        if url is None:
+            url = self._resolved[href] = self._join(href) or absolute_url(self.base_url, href)
+        return url
+
+    def _join(self, href):
+        """absolute_url() of a plain relative path by concatenation, or None for anything else"""
+        if (self._origin is None or not href or href[0] in '.?#' or href[:2] == '//'
+                or ':' in href or '#' in href or '/.' in href or '//' in href or ' ' in href
+                or not href.isprintable()):
+            return None
+        path, _, query = href.partition('?')
+        url = (self._origin if path[:1] == '/' else self._directory) + path
+        if query:
+            query = strip_tracking(query)
+        return f"{url}?{query}" if query else url
+
+    def add(self, href, text=''):
+        """Add an href/src with its text; returns the normalized URL"""
+        url = self.resolve(href)
+        if url not in self.texts or (text and not self.texts[url]):
+            self.texts[url] = text
+        return url
+
+    def link_lines(self):
+        return [f"{url} ({text})" if text else url for url, text in self.texts.items()]
+
+    def image_lines(self):
+        return [f"{url} (Alt: {NO_ALT_TEXT if text is None else text})" for url, text in self.texts.items()]
+
+
+def parse_result_line(line, kind=LINK):
+    """(url, text) of one line of a links or images result; text is None when there is none"""
+    url, _, rest = line.partition(' ')
+    if not (rest.startswith('(') and rest.endswith(')')):
+        return url, rest or None
+    text = rest[1:-1]
+    if kind == IMAGE and text.startswith('Alt: '):
+        text = text[len('Alt: '):]
+        if text == NO_ALT_TEXT:
+            return url, None
+    return url, text or None
+
+
+class IndexedURL:
+    """A unique link or image of a batch and the pages referencing it"""
+    __slots__ = ('url', 'kind', 'host', 'text', 'pages')
+
+    def __init__(self, url, kind, host, text, page):
+        self.url = url
+        self.kind = kind
+        self.host = host
+        self.text = text
+        self.pages = {page: None}  # referencing pages in order of discovery, without repeats
+
+
+class LinkIndex:
+    """Unique links and images over a batch, by host; thread-safe.
+
+    URLs, hosts and page URLs are interned, so an item referenced from
+    thousands of pages costs one record plus one pointer per page.
+    """
+
+    def __init__(self):
+        self.urls = {LINK: {}, IMAGE: {}}  # kind -> url -> IndexedURL
+        self.hosts = {}  # host -> IndexedURLs in order of discovery
+        self._lock = threading.Lock()
+
+    def add_results(self, page_url, results):
+        """Index the links and images results of one page; of a change delta, only the added items"""
+        page_url = sys.intern(page_url)
+        with self._lock:
+            for mode, kind in KINDS.items():
+                result = results.get(mode)
+                if not result:
+                    continue
+                for line in result.split('\n'):
+                    if line.startswith(DELTA_ADDED):
+                        line = line[len(DELTA_ADDED):]
+                    elif line.startswith(DELTA_REMOVED):
+                        continue
+                    if line:
+                        url, text = parse_result_line(line, kind)
+                        self._add(page_url, kind, url, text)
+
+    def _add(self, page_url, kind, url, text):
+        entry = self.urls[kind].get(url)
+        if entry is None:
+            try:
+                host = (urlsplit(url).hostname or '').lower()
+            except ValueError:
+                host = ''
+            entry = IndexedURL(sys.intern(url), kind, sys.intern(host), text, page_url)
+            self.urls[kind][entry.url] = entry
+            self.hosts.setdefault(entry.host, []).append(entry)
+            return
+        entry.pages.setdefault(page_url, None)
+        if text and not entry.text:
+            entry.text = text
+
+    def by_domain(self, domain, kind=None, subdomains=True):
+        """Indexed URLs on a domain (and by default its subdomains), optionally of one kind"""
+        domain = domain.lower().strip('.')
+        suffix = '.' + domain
+        with self._lock:
+            return [
+                entry for host, entries in self.hosts.items()
+                if host == domain or (subdomains and host.endswith(suffix))
+                for entry in entries if kind is None or entry.kind == kind
+            ]
+
+    def domains(self, kind=None):
+        """Counter of unique URLs per host"""
+        with self._lock:
+            return Counter({
+                host: sum(1 for entry in entries if kind is None or entry.kind == kind)
+                for host, entries in self.hosts.items()
+            })
+
+    def count(self, kind):
+        return len(self.urls[kind])
+
+    def __len__(self):
+        return sum(len(urls) for urls in self.urls.values())
+
+    def entries(self, domains=None):
+        """Every indexed URL, links first, or only those on the given domains"""
+        if domains:
+            seen = set()
+            for domain in domains:
+                for entry in self.by_domain(domain):
+                    if id(entry) not in seen:
+                        seen.add(id(entry))
+                        yield entry
+            return
+        with self._lock:
+            snapshot = [entry for urls in self.urls.values() for entry in urls.values()]
+        yield from snapshot
+
+    def write_csv(self, path, domains=None):
+        """Write one row per unique URL (see INDEX_FIELDS); returns the number of rows"""
+        rows = 0
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(INDEX_FIELDS)
+            for entry in self.entries(domains):
+                writer.writerow((
+                    entry.kind, entry.url, entry.host, len(entry.pages), next(iter(entry.pages)), entry.text or '',
+                ))
+                rows += 1
+        return rows
+
+    def summary(self):
+        return (f"{self.count(LINK)} unique links and {self.count(IMAGE)} unique images "
+                f"on {len(self.hosts)} hosts")
@@ -0,0 +1,258 @@
+"""Per-URL phase timings, batch throughput statistics and an optional profiler.
+
+Scraper.fetch_url times each URL's phases into a PhaseTimings, which it
+stores in meta['timings']. The pooled HTTP client adds DNS, connect and TLS
+times to the timings of the thread that opened the connection, so these
+phases are only non-zero when no kept-alive connection could be reused.
+BatchStats collects the meta of a batch and summarises it as latency
+percentiles, throughput and the slowest hosts.
+"""
+import io
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+# Phases of one fetch, in pipeline order
+ROBOTS = 'robots'
+DNS = 'dns'
+CONNECT = 'connect'
+TLS = 'tls'
+TTFB = 'ttfb'
+DOWNLOAD = 'download'
+RENDER = 'render'
+PARSE = 'parse'
+EXTRACT = 'extract'
+PHASES = (ROBOTS, DNS, CONNECT, TLS, TTFB, DOWNLOAD, RENDER, PARSE, EXTRACT)
+
+# Connection setup phases, recorded by http_session while a request is being sent
+CONNECTION_PHASES = (DNS, CONNECT, TLS)
+
+# Hosts listed in a summary's slowest_hosts
+SLOWEST_HOSTS = 10
+
+_local = threading.local()
+
+
+def current_timings():
+    """PhaseTimings of the fetch running in this thread, or None"""
+    return getattr(_local, 'timings', None)
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile (0-100) of an already sorted list; None when empty"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class PhaseTimings:
+    """Seconds spent in each phase of one fetch.
+
+    While activated it is the current_timings() of its thread, so the HTTP
+    client can add connection setup times to it.
+    """
+    __slots__ = ('seconds', '_previous')
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self._previous = None
+
+    def activate(self):
+        self._previous = current_timings()
+        _local.timings = self
+
+    def deactivate(self):
+        _local.timings = self._previous
+        self._previous = None
+
+    def add(self, phase, seconds):
+        self.seconds[phase] += seconds
+
+    def connection_seconds(self):
+        return sum(self.seconds[phase] for phase in CONNECTION_PHASES)
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block as one phase; connections opened inside it count towards that phase only"""
+        start = time.perf_counter()
+        previous, _local.timings = current_timings(), None
+        try:
+            yield
+        finally:
+            _local.timings = previous
+            self.add(name, time.perf_counter() - start)
+
+
+class BatchStats:
+    """Timings of every URL in a batch and summary statistics over them"""
+
+    def __init__(self):
+        self.records = []  # (url, host, latency, bytes, error_type, phase seconds)
+        self.started = time.perf_counter()
+        self.finished = None
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+    def add(self, url, meta):
+        """Record one completed URL from its fetch meta"""
+        timings = meta.get('timings') or {}
+        self.records.append((
+            url, urlsplit(url).netloc, meta.get('fetch_seconds') or 0.0, meta.get('bytes') or 0,
+            meta.get('error_type'), tuple(timings.get(phase, 0.0) for phase in PHASES)
+        ))
+        self.finished = time.perf_counter()
+
+    def summary(self):
+        """Latency percentiles, throughput, per-phase percentiles and slowest hosts as a dict"""
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        latencies = sorted(record[2] for record in self.records)
+        total_bytes = sum(record[3] for record in self.records)
+        phases = {}
+        for index, phase in enumerate(PHASES):
+            values = sorted(record[5][index] for record in self.records)
+            phases[phase] = {
+                'p50': _round(percentile(values, 50)),
+                'p95': _round(percentile(values, 95)),
+                'total': _round(sum(values)),
+            }
+
+        hosts = {}
+        for record in self.records:
+            hosts.setdefault(record[1], []).append(record[2])
+        slowest = sorted(hosts.items(), key=lambda item: sum(item[1]) / len(item[1]), reverse=True)[:SLOWEST_HOSTS]
+
+        return {
+            'started_at': self.started_at,
+            'pages': len(self.records),
+            'failed': sum(1 for record in self.records if record[4]),
+            'elapsed_seconds': _round(elapsed),
+            'pages_per_second': _round(len(self.records) / elapsed if elapsed else 0.0),
+            'bytes_per_second': round(total_bytes / elapsed if elapsed else 0.0),
+            'bytes': total_bytes,
+            'latency': {
+                'p50': _round(percentile(latencies, 50)),
+                'p95': _round(percentile(latencies, 95)),
+                'max': _round(latencies[-1] if latencies else None),
+            },
+            'phases': phases,
+            'slowest_hosts': [
+                {'host': host, 'pages': len(values), 'mean_seconds': _round(sum(values) / len(values)),
+                 'max_seconds': _round(max(values))}
+                for host, values in slowest
+            ],
+        }
+
+    def report(self):
+        """The summary as aligned plain text"""
+        summary = self.summary()
+        latency = summary['latency']
+        lines = [
+            f"Pages: {summary['pages']} ({summary['failed']} failed) in {summary['elapsed_seconds']:.2f}s",
+            f"Throughput: {summary['pages_per_second']:.2f} pages/s, {summary['bytes_per_second'] / 1024:.1f} KiB/s",
+        ]
+        if latency['p50'] is not None:
+            lines.append(f"Latency: p50 {latency['p50']:.3f}s, p95 {latency['p95']:.3f}s, max {latency['max']:.3f}s")
+            lines.append("")
+            lines.append(f"{'Phase':<10}{'p50':>10}{'p95':>10}{'total':>12}")
+            for phase, stats in summary['phases'].items():
+                lines.append(f"{phase:<10}{stats['p50']:>10.4f}{stats['p95']:>10.4f}{stats['total']:>12.3f}")
+        if summary['slowest_hosts']:
+            lines.append("")
+            lines.append("Slowest hosts (mean latency):")
+            for host in summary['slowest_hosts']:
+                lines.append(f"  {host['mean_seconds']:.3f}s  {host['host']} ({host['pages']} pages)")
+        return "\n".join(lines)
+
+    def to_json(self, path):
+        """Write the summary and every URL's phase timings to a JSON file"""
+        data = self.summary()
+        data['urls'] = [
+            {'url': url, 'seconds': latency, 'bytes': size, 'error_type': error_type,
+             'phases': dict(zip(PHASES, (_round(value) for value in phases)))}
+            for url, _, latency, size, error_type, phases in self.records
+        ]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+
+
+def _round(value):
+    return None if value is None else round(value, 4)
+
+
+class RunProfiler:
+    """cProfile and/or tracemalloc over one run, including threads started during it.
+
+    Before Python 3.12 a profiler only sees its own thread, so each thread
+    started while profiling gets its own and the results are merged.
+    """
+
+    def __init__(self, cpu=True, memory=False):
+        self.cpu = cpu
+        self.memory = memory
+        self.profilers = []
+        self.snapshot = None
+        self.peak_bytes = None
+
+    def _profile_thread(self, frame, event, arg):
+        # First event in a new thread: replace this hook with a profiler of the thread's own
+        sys.setprofile(None)
+        profiler = cProfile.Profile()
+        self.profilers.append(profiler)
+        profiler.enable()
+
+    def start(self):
+        if self.memory:
+            tracemalloc.start()
+        if self.cpu:
+            profiler = cProfile.Profile()
+            self.profilers.append(profiler)
+            profiler.enable()
+            if sys.version_info < (3, 12):
+                threading.setprofile(self._profile_thread)
+
+    def stop(self):
+        if self.cpu:
+            threading.setprofile(None)
+            self.profilers[0].disable()
+        if self.memory:
+            self.snapshot = tracemalloc.take_snapshot()
+            self.peak_bytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def stats(self):
+        """pstats.Stats merged over all profiled threads, or None"""
+        if not self.profilers:
+            return None
+        stats = pstats.Stats(self.profilers[0])
+        for profiler in self.profilers[1:]:
+            stats.add(profiler)
+        return stats
+
+    def dump(self, path):
+        """Save the CPU profile for pstats, snakeviz and similar viewers"""
+        stats = self.stats()
+        if stats is not None:
+            stats.dump_stats(path)
+
+    def report(self, limit=20):
+        """Top functions by cumulative time and top allocation sites as text"""
+        sections = []
+        stats = self.stats()
+        if stats is not None:
+            stats.stream = io.StringIO()
+            stats.sort_stats('cumulative').print_stats(limit)
+            sections.append(stats.stream.getvalue().strip())
+        if self.snapshot is not None:
+            lines = [f"Peak traced memory: {self.peak_bytes / 1024 / 1024:.1f} MiB", "Top allocations:"]
+            for stat in self.snapshot.statistics('lineno')[:limit]:
+                lines.append(f"  {stat}")
+            sections.append("\n".join(lines))
+        return "\n\n".join(sections)
+
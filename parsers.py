@@ -0,0 +1,189 @@
+"""HTML parser backends for the extractors.
+
+Every backend returns a document exposing the small part of the
+BeautifulSoup API the extractors use: find_all(name or names, recursive=True)
+in document order, and nodes with .name, .attrs, .get(attr), [attr] and
+get_text(). Like BeautifulSoup's, get_text() leaves out the contents of
+<script>, <style> and <template>.
+BeautifulSoup's html.parser is always available; lxml and selectolax
+(lexbor) are used when installed.
+"""
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    import lxml.etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+# Elements whose contents are code or inert markup, not text of the page
+NON_TEXT_TAGS = frozenset(('script', 'style', 'template'))
+NON_TEXT_SELECTOR = ', '.join(sorted(NON_TEXT_TAGS))
+
+if LXML_AVAILABLE:
+    # Text nodes below an element, outside non-text elements (also ones around it, as with <template>)
+    _LXML_TEXT = lxml.etree.XPath(
+        './/text()[not(' + ' or '.join(f'ancestor::{tag}' for tag in sorted(NON_TEXT_TAGS)) + ')]'
+    )
+
+
+def _names(name):
+    return (name,) if isinstance(name, str) else tuple(name)
+
+
+class LxmlNode:
+    """BeautifulSoup-like view of an lxml element"""
+    __slots__ = ('element',)
+
+    def __init__(self, element):
+        self.element = element
+
+    @property
+    def name(self):
+        return self.element.tag
+
+    @property
+    def attrs(self):
+        return self.element.attrib
+
+    def get(self, attr, default=None):
+        return self.element.get(attr, default)
+
+    def __getitem__(self, attr):
+        return self.element.attrib[attr]
+
+    def get_text(self):
+        return ''.join(_LXML_TEXT(self.element))
+
+    def find_all(self, name, recursive=True):
+        if not recursive:
+            return [LxmlNode(element) for element in self.element.iterchildren(*_names(name))]
+        return [LxmlNode(element) for element in self.element.iterdescendants(*_names(name))]
+
+
+class LexborNode:
+    """BeautifulSoup-like view of a selectolax (lexbor) node"""
+    __slots__ = ('node', 'mixed')
+
+    def __init__(self, node, mixed=None):
+        self.node = node
+        # mem_ids of the document's elements that contain non-text elements; None when unknown
+        self.mixed = mixed
+
+    @property
+    def name(self):
+        return self.node.tag
+
+    @property
+    def attrs(self):
+        return self.node.attributes
+
+    def get(self, attr, default=None):
+        value = self.node.attributes.get(attr, default)
+        # Valueless attributes (<a href>) come back as None; BeautifulSoup gives ''
+        return '' if value is None and attr in self.node.attributes else value
+
+    def __getitem__(self, attr):
+        value = self.get(attr)
+        if value is None:
+            raise KeyError(attr)
+        return value
+
+    def get_text(self):
+        if self.mixed is None:
+            plain = self.node.css_first(NON_TEXT_SELECTOR) is None
+        else:
+            plain = self.node.mem_id not in self.mixed
+        if plain:
+            return self.node.text(deep=True, separator='')
+        texts = []
+        _lexbor_texts(self.node, texts)
+        return ''.join(texts)
+
+    def find_all(self, name, recursive=True):
+        names = _names(name)
+        if not recursive:
+            return [LexborNode(node, self.mixed) for node in self.node.iter(include_text=False) if node.tag in names]
+        # CSS matching runs in lexbor; it includes the node itself when it matches
+        return [
+            LexborNode(node, self.mixed) for node in self.node.css(", ".join(names))
+            if node.mem_id != self.node.mem_id
+        ]
+
+
+def _lexbor_texts(node, texts):
+    for child in node.iter(include_text=True):
+        if child.tag == '-text':
+            texts.append(child.text_content)
+        elif child.tag not in NON_TEXT_TAGS:
+            _lexbor_texts(child, texts)
+
+
+class HtmlParserBackend:
+    """BeautifulSoup with Python's built-in html.parser (always available)"""
+    name = 'html.parser'
+    # Omitted </td> and </tr> leave later rows nested inside the open cell
+    closes_implied_tags = False
+
+    def parse(self, html):
+        return BeautifulSoup(html, 'html.parser')
+
+
+class LxmlBackend:
+    """lxml's libxml2 HTML parser"""
+    name = 'lxml'
+    closes_implied_tags = True
+
+    def parse(self, html):
+        if not html.strip():
+            return BeautifulSoup('', 'html.parser')
+        try:
+            return LxmlNode(lxml.html.document_fromstring(html))
+        except (lxml.etree.ParserError, ValueError):
+            # e.g. str input with an XML encoding declaration
+            return LxmlNode(lxml.html.document_fromstring(html.encode('utf-8')))
+
+
+class LexborBackend:
+    """selectolax's lexbor HTML5 parser"""
+    name = 'selectolax'
+    closes_implied_tags = True
+
+    def parse(self, html):
+        root = LexborHTMLParser(html).root
+        # Elements around a script/style/template, so get_text() knows which nodes need the slow path
+        mixed = set()
+        for node in root.css(NON_TEXT_SELECTOR):
+            parent = node.parent
+            while parent is not None and parent.mem_id not in mixed:
+                mixed.add(parent.mem_id)
+                parent = parent.parent
+        return LexborNode(root, mixed)
+
+
+# Fastest first; 'auto' picks the first one installed
+BACKENDS = {}
+if SELECTOLAX_AVAILABLE:
+    BACKENDS[LexborBackend.name] = LexborBackend
+if LXML_AVAILABLE:
+    BACKENDS[LxmlBackend.name] = LxmlBackend
+BACKENDS[HtmlParserBackend.name] = HtmlParserBackend
+
+
+def available_backends():
+    """Names of installed backends, fastest first"""
+    return list(BACKENDS)
+
+
+def get_backend(name='auto'):
+    """Return a parser backend by name, falling back to html.parser"""
+    if name == 'auto':
+        name = next(iter(BACKENDS))
+    return BACKENDS.get(name, HtmlParserBackend)()
@@ -0,0 +1,268 @@
+"""PDF report generation for scraped results.
+
+Font discovery and TTF metrics are cached across exports, special
+characters are cleaned in a single str.translate pass, the font is set
+once per run of lines with the same style, and the document buffer is
+assembled from chunks instead of repeated string concatenation.
+"""
+import os
+import threading
+from datetime import datetime
+
+import fpdf
+from fpdf import FPDF
+
+from extractors import SCRAPE_MODES
+
+# Replace problematic Unicode characters with ASCII equivalents
+SPECIAL_CHARS = str.maketrans({
+    '\u2018': "'", '\u2019': "'",  # Curly single quotes
+    '\u201C': '"', '\u201D': '"',   # Curly double quotes
+    '\u2013': '-', '\u2014': '--',  # En/em dashes
+    '\u2026': '...',                # Ellipsis
+    '\u00A0': ' ',                  # Non-breaking space
+    '\u00B0': '°',                  # Degree symbol
+    '\u20AC': 'EUR',                # Euro symbol
+    '\u00A3': 'GBP',                # Pound symbol
+    '\u00A5': 'JPY',                # Yen symbol
+    '\u00A9': '(c)',                # Copyright
+    '\u00AE': '(R)',                # Registered trademark
+})
+
+# Where to look for DejaVu fonts besides the working directory and fpdf's font dir
+FONT_DIRS = [
+    os.path.dirname(os.path.abspath(__file__)),
+    '/usr/share/fonts/truetype/dejavu',
+    '/usr/share/fonts/dejavu',
+    '/Library/Fonts',
+    os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts'),
+]
+DEJAVU_STYLES = (('', 'DejaVuSans.ttf'), ('B', 'DejaVuSans-Bold.ttf'), ('I', 'DejaVuSans-Oblique.ttf'))
+
+# fpdf pickles parsed TTF metrics here so later exports skip re-parsing the font files
+FONT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.webscraper', 'fonts')
+
+_font_lock = threading.Lock()
+_font_files = None
+
+
+class FontCoverage(dict):
+    """str.translate table for Unicode fonts: keeps the characters every loaded font has a glyph for.
+
+    fpdf 1.7 only handles the Basic Multilingual Plane; a character past the
+    font's width table fails the whole output() call, and one without a
+    glyph prints nothing. Both are dropped. Lookups are cached per character.
+    """
+
+    def __init__(self, widths):
+        super().__init__()
+        self.widths = widths  # each font's char widths, indexed by code point
+
+    def __missing__(self, code):
+        # ASCII (tabs included) always passes, as it does when a whole line is ASCII
+        covered = code < 128 or all(code < len(cw) and cw[code] for cw in self.widths)
+        self[code] = value = code if covered else None
+        return value
+
+
+def clean_special_chars(text):
+    """Replace problematic Unicode characters with ASCII equivalents"""
+    return text.translate(SPECIAL_CHARS)
+
+
+def find_fonts():
+    """Paths of the DejaVu font files by style; resolved once per process.
+
+    Returns {} when the regular and bold fonts are not both available.
+    """
+    global _font_files
+    with _font_lock:
+        if _font_files is None:
+            found = {}
+            for style, name in DEJAVU_STYLES:
+                for directory in [''] + FONT_DIRS:
+                    path = os.path.join(directory, name)
+                    if os.path.exists(path):
+                        found[style] = path
+                        break
+            _font_files = found if '' in found and 'B' in found else {}
+            if _font_files:
+                try:
+                    os.makedirs(FONT_CACHE_DIR, exist_ok=True)
+                    fpdf.set_global('FPDF_CACHE_MODE', 2)
+                    fpdf.set_global('FPDF_CACHE_DIR', FONT_CACHE_DIR)
+                except OSError:
+                    pass
+        return _font_files
+
+
+def classify(line):
+    """Style of a report line: 'heading', 'link' or 'text'"""
+    if (line.upper() == line and len(line) < 50) or line.endswith(':'):
+        return 'heading'
+    if line.startswith(('http://', 'https://')):
+        return 'link'
+    return 'text'
+
+
+def report_lines(data):
+    """Cleaned, non-empty lines of one URL's results"""
+    # One bold "Mode:" heading per section when several modes were scraped
+    if len(data) > 1:
+        content = "\n".join(f"{SCRAPE_MODES[mode]}:\n{result}" for mode, result in data.items())
+    else:
+        content = "\n".join(data.values())
+    for line in clean_special_chars(content).split('\n'):
+        line = line.strip()
+        if line:
+            yield line
+
+
+class ChunkBuffer:
+    """Append-only stand-in for FPDF's str output buffer.
+
+    FPDF 1.7 grows self.buffer with += on an attribute, which copies the
+    whole document on every write; here writes are list appends.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.length = 0
+
+    def __iadd__(self, text):
+        self.chunks.append(text)
+        self.length += len(text)
+        return self
+
+    def __len__(self):
+        return self.length
+
+    def __str__(self):
+        return ''.join(self.chunks)
+
+    def encode(self, encoding):
+        return str(self).encode(encoding)
+
+
+class ReportPDF(FPDF):
+    """FPDF with a ChunkBuffer output buffer"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buffer = ChunkBuffer()
+
+    def _out(self, s):
+        if self.state == 2:
+            super()._out(s)
+            return
+        if isinstance(s, bytes):
+            # binary data is carried as latin1, like FPDF does
+            s = s.decode('latin1')
+        elif not isinstance(s, str):
+            s = str(s)
+        self.buffer += s + "\n"
+
+
+class PdfReport:
+    """Builds the scraping report; usable from any thread"""
+
+    def __init__(self, progress=None):
+        self.progress = progress
+        self.pdf = ReportPDF()
+        self.pdf.set_auto_page_break(auto=True, margin=15)
+
+        fonts = find_fonts()
+        self.unicode = bool(fonts)
+        self.coverage = None
+        if fonts:
+            for style, path in fonts.items():
+                self.pdf.add_font('DejaVu', style, path, uni=True)
+            self.font_family = 'DejaVu'
+            self.coverage = FontCoverage([font['cw'] for font in self.pdf.fonts.values()])
+        else:
+            self.font_family = 'Arial'
+
+    def safe(self, text):
+        """Drop characters the fonts cannot print up front, so one of them cannot fail the whole export"""
+        if text.isascii():
+            return text
+        if self.unicode:
+            return text.translate(self.coverage)
+        # Core fonts only cover Latin-1
+        return text.encode('latin-1', 'ignore').decode('latin-1')
+
+    def add_cover(self, urls):
+        pdf = self.pdf
+        pdf.add_page()
+        pdf.set_font(self.font_family, 'B', 20)
+        pdf.cell(0, 40, "Web Scraping Report", 0, 1, 'C')
+        pdf.ln(20)
+
+        pdf.set_font(self.font_family, '', 14)
+        pdf.cell(0, 10, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", 0, 1, 'C')
+        pdf.ln(10)
+
+        pdf.set_font(self.font_family, 'B', 16)
+        pdf.cell(0, 10, "Scraped URLs:", 0, 1)
+        pdf.set_font(self.font_family, '', 12)
+        for url in urls:
+            pdf.cell(0, 10, self.safe(f"- {url}"), 0, 1)
+
+    def add_results(self, url, data):
+        """One section per URL; consecutive lines of the same style share one font/colour setup"""
+        pdf = self.pdf
+        pdf.add_page()
+        pdf.set_font(self.font_family, 'B', 16)
+        pdf.cell(0, 10, self.safe(f"Results from: {url}"), 0, 1)
+        pdf.ln(10)
+
+        run_style, run = None, []
+        for line in report_lines(data):
+            style = classify(line)
+            if style != run_style and run:
+                self._write_run(run_style, run)
+                run = []
+            run_style = style
+            run.append(self.safe(line))
+        if run:
+            self._write_run(run_style, run)
+
+    def _write_run(self, style, lines):
+        pdf = self.pdf
+        if style == 'heading':
+            pdf.set_font(self.font_family, 'B', 12)
+            for line in lines:
+                pdf.cell(0, 10, line, 0, 1)
+                pdf.ln(2)
+        elif style == 'link':
+            pdf.set_font(self.font_family, '', 12)
+            pdf.set_text_color(0, 0, 255)
+            for line in lines:
+                pdf.cell(0, 10, line, 0, 1, link=line)
+                pdf.ln(2)
+            pdf.set_text_color(0, 0, 0)
+        else:
+            pdf.set_font(self.font_family, '', 12)
+            for line in lines:
+                pdf.multi_cell(0, 10, line)
+                pdf.ln(2)
+
+    def build(self, url_data, file_path):
+        """Write the full report for url_data ({url: {mode: result}}) to file_path"""
+        sections = [(url, data) for url, data in url_data.items() if data]
+        self.add_cover(url_data)
+        for done, (url, data) in enumerate(sections, 1):
+            self.add_results(url, data)
+            if self.progress:
+                self.progress(done / (len(sections) + 1) * 100)
+        self.pdf.output(file_path)
+        if self.progress:
+            self.progress(100)
+        return file_path
+
+
+def export_pdf(url_data, file_path, progress=None):
+    """Build and save the PDF report; returns whether Unicode fonts were used"""
+    report = PdfReport(progress)
+    report.build(url_data, file_path)
+    return report.unicode
@@ -0,0 +1,236 @@
+"""Per-host politeness: robots.txt rules, request rate limits and throttling backoff.
+
+RobotsCache fetches and parses each origin's robots.txt once and is safe
+to use from the fetch threads. PolitenessScheduler is used by the
+dispatcher in Scraper.fetch_urls to decide when the next request to a host
+may start, so one slow or throttling host never holds up the others.
+"""
+import math
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+from http_session import USER_AGENT_TOKEN
+
+# How long a parsed robots.txt is trusted, and how long a failed fetch of one is
+ROBOTS_TTL = 24 * 3600
+ROBOTS_ERROR_TTL = 300
+
+# robots.txt files are cut off here (RFC 9309 requires parsing at least 500 KiB)
+ROBOTS_MAX_BYTES = 512 * 1024
+
+# Requests per second and burst size per host when robots.txt sets no Crawl-delay
+DEFAULT_HOST_RATE = 4.0
+DEFAULT_HOST_BURST = 4
+
+# Cooldown after a 429/503 without Retry-After; doubled on each repeat up to MAX_BACKOFF
+DEFAULT_BACKOFF = 5.0
+MAX_BACKOFF = 300.0
+
+# Status codes that mean "slow down" rather than "this page failed"
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+class RobotsDisallowed(Exception):
+    """Raised for URLs that robots.txt does not allow us to fetch"""
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def url_origin(url):
+    """scheme://host[:port] of a URL; robots.txt applies per origin"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class TokenBucket:
+    """Token bucket refilled at rate tokens per second, holding at most burst tokens"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """Seconds until a token is available"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+
+class RobotsCache:
+    """robots.txt rules per origin, fetched on first use.
+
+    Follows RFC 9309 for status codes: a 4xx robots.txt allows everything,
+    a 5xx disallows everything until ROBOTS_ERROR_TTL has passed and the
+    file is fetched again. When the server cannot be reached at all the
+    page fetch is let through, so it reports the actual connection error.
+    """
+
+    def __init__(self, http, user_agent=USER_AGENT_TOKEN, timeout=10):
+        self.http = http
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.entries = {}  # origin -> (RobotFileParser, expires)
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def loaded(self, url):
+        """Whether rules for url's origin are cached and fresh"""
+        entry = self.entries.get(url_origin(url))
+        return entry is not None and entry[1] > time.monotonic()
+
+    def get(self, url):
+        """Rules for url's origin; fetches robots.txt at most once at a time per origin"""
+        origin = url_origin(url)
+        entry = self.entries.get(origin)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
+
+        with self._lock:
+            lock = self._locks.setdefault(origin, threading.Lock())
+        with lock:
+            entry = self.entries.get(origin)
+            if entry is None or entry[1] <= time.monotonic():
+                rules, ttl = self._fetch(origin)
+                entry = self.entries[origin] = (rules, time.monotonic() + ttl)
+        return entry[0]
+
+    def _fetch(self, origin):
+        rules = RobotFileParser(origin + "/robots.txt")
+        try:
+            with self.http.open(origin + "/robots.txt", timeout=self.timeout) as response:
+                status_code = response.status_code
+                body = bytearray()
+                if status_code < 400:
+                    # Streamed, so an oversized file is cut off without being downloaded in full
+                    for chunk in response.iter_bytes():
+                        body += chunk
+                        if len(body) >= ROBOTS_MAX_BYTES:
+                            break
+        except Exception:
+            rules.allow_all = True
+            return rules, ROBOTS_ERROR_TTL
+
+        if status_code >= 500:
+            rules.disallow_all = True
+            return rules, ROBOTS_ERROR_TTL
+        if status_code >= 400:
+            rules.allow_all = True
+            return rules, ROBOTS_TTL
+        rules.parse(body[:ROBOTS_MAX_BYTES].decode('utf-8', errors='replace').splitlines())
+        return rules, ROBOTS_TTL
+
+    def can_fetch(self, url):
+        return self.get(url).can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, url):
+        """Seconds between requests asked for by Crawl-delay or Request-rate, or None"""
+        rules = self.get(url)
+        delay = rules.crawl_delay(self.user_agent)
+        if delay is not None:
+            return float(delay)
+        rate = rules.request_rate(self.user_agent)
+        if rate is not None and rate.requests:
+            return rate.seconds / rate.requests
+        return None
+
+
+class HostState:
+    """Rate limit and throttling state of one host"""
+    __slots__ = ('bucket', 'cooldown_until', 'backoff', 'configured')
+
+    def __init__(self, rate, burst):
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.cooldown_until = 0.0
+        self.backoff = 0.0
+        self.configured = False
+
+
+class PolitenessScheduler:
+    """Decides when the next request to each host may start.
+
+    Each host has a token bucket (slowed to its robots.txt Crawl-delay once
+    that is known) and a cooldown set by 429/503 responses. Only the
+    dispatcher thread calls it. rate=None leaves hosts without a Crawl-delay unlimited.
+    """
+
+    def __init__(self, robots=None, rate=DEFAULT_HOST_RATE, burst=DEFAULT_HOST_BURST):
+        self.robots = robots
+        self.rate = rate
+        self.burst = burst
+        self.hosts = {}
+
+    def _state(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostState(self.rate, self.burst)
+        return state
+
+    def ready_in(self, host, url, in_flight, now):
+        """Seconds until a request for url may start; math.inf while waiting on an in-flight request.
+
+        Until a host's robots.txt is loaded only one request to it runs, so
+        its Crawl-delay is known before the rest are sent.
+        """
+        state = self._state(host)
+        if not state.configured and self.robots is not None:
+            if not self.robots.loaded(url):
+                return math.inf if in_flight else 0.0
+            delay = self.robots.crawl_delay(url)
+            if delay:
+                # The request that loaded robots.txt has used this interval's token
+                state.bucket = TokenBucket(min(self.rate or math.inf, 1 / delay), 1)
+                state.bucket.tokens = 0.0
+            state.configured = True
+        wait = state.bucket.wait_time(now) if state.bucket is not None else 0.0
+        return max(state.cooldown_until - now, wait, 0.0)
+
+    def blocked(self, url):
+        """Whether url is known to be disallowed; such requests fail without a fetch and cost no token"""
+        return self.robots is not None and self.robots.loaded(url) and not self.robots.can_fetch(url)
+
+    def acquire(self, host, now):
+        """Record that a request to host is starting"""
+        state = self._state(host)
+        if state.bucket is not None:
+            state.bucket.take(now)
+
+    def throttled(self, host, retry_after=None):
+        """Pause a host after a 429/503, for Retry-After seconds or an exponential backoff"""
+        state = self._state(host)
+        if retry_after is None:
+            state.backoff = min(MAX_BACKOFF, state.backoff * 2 or DEFAULT_BACKOFF)
+            retry_after = state.backoff
+        state.cooldown_until = max(state.cooldown_until, time.monotonic() + min(retry_after, MAX_BACKOFF))
+
+    def succeeded(self, host):
+        """Reset a host's backoff after a normal response"""
+        self._state(host).backoff = 0.0
@@ -0,0 +1,198 @@
+"""Optional JavaScript rendering of dynamic pages with headless Chromium (Playwright).
+
+A RenderPool launches one browser on first use and keeps it until
+close(). The browser is driven from a background event loop thread, so
+any fetch thread can call render() and block until its page is done. At
+most max_pages pages render at once. Pages are reused: each stays open
+for up to pages_per_context renders before its browser context is closed
+and replaced, which bounds what a long run accumulates without starting
+a browser per URL. Images, fonts and media are not downloaded.
+
+The Scraper uses a pool for URLs on its flagged domains and, with
+auto=True, for static pages that look like an empty shell filled in by
+scripts.
+"""
+import re
+import asyncio
+import threading
+from urllib.parse import urlsplit
+
+try:
+    from playwright.async_api import async_playwright
+    PLAYWRIGHT_AVAILABLE = True
+except ImportError:
+    PLAYWRIGHT_AVAILABLE = False
+
+DEFAULT_RENDER_PAGES = 4
+PAGES_PER_CONTEXT = 50
+RENDER_TIMEOUT = 30
+
+# Playwright resource types that are aborted instead of downloaded
+BLOCKED_RESOURCE_TYPES = frozenset(('image', 'font', 'media'))
+
+# Navigation is done when the network has been idle for 500ms ('load' is faster but may miss XHR content)
+WAIT_UNTIL = 'networkidle'
+
+# With auto, a static page with scripts and less visible text than this is rendered
+AUTO_RENDER_MAX_TEXT = 200
+
+SCRIPT_PATTERN = re.compile(r'<script\b', re.IGNORECASE)
+INVISIBLE_PATTERN = re.compile(
+    r'<(script|style|noscript|template)\b.*?</\1\s*>|<!--.*?-->|<[^>]*>', re.IGNORECASE | re.DOTALL
+)
+
+
+class RenderError(Exception):
+    """The rendered page answered with an error status"""
+
+
+def visible_text_length(html):
+    """Non-whitespace characters of text outside tags, scripts, styles and comments"""
+    return sum(len(word) for word in INVISIBLE_PATTERN.sub(' ', html).split())
+
+
+def looks_unrendered(html, max_text=AUTO_RENDER_MAX_TEXT):
+    """Whether static HTML looks like a shell filled in by scripts: it has scripts but almost no visible text"""
+    return bool(SCRIPT_PATTERN.search(html)) and visible_text_length(html) < max_text
+
+
+class RenderPool:
+    """Reused headless Chromium pages shared by all fetch threads.
+
+    domains are the hosts (with their subdomains) whose pages are always
+    rendered; auto also renders static pages that looks_unrendered().
+    """
+
+    def __init__(self, max_pages=DEFAULT_RENDER_PAGES, domains=(), auto=False, timeout=RENDER_TIMEOUT,
+                 block_resources=BLOCKED_RESOURCE_TYPES, pages_per_context=PAGES_PER_CONTEXT, wait_until=WAIT_UNTIL,
+                 user_agent=None):
+        if not PLAYWRIGHT_AVAILABLE:
+            raise RuntimeError(
+                "JavaScript rendering requires playwright (pip install playwright, then playwright install chromium)"
+            )
+        self.max_pages = max(1, max_pages)
+        self.domains = {domain.lower().strip('.') for domain in domains}
+        self.auto = auto
+        self.timeout = timeout
+        self.block_resources = frozenset(block_resources or ())
+        self.pages_per_context = max(1, pages_per_context)
+        self.wait_until = wait_until
+        self.user_agent = user_agent
+        self.renders = 0
+
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        # Owned by the event loop thread
+        self._playwright = None
+        self._browser = None
+        self._slots = None
+        self._idle = []  # [context, page, renders] ready for reuse
+
+    def flagged(self, url):
+        """Whether url is on one of the domains that are always rendered"""
+        if not self.domains:
+            return False
+        host = (urlsplit(url).hostname or '').lower()
+        return any(host == domain or host.endswith('.' + domain) for domain in self.domains)
+
+    def should_render(self, html, results):
+        """With auto, whether a statically extracted page should be rendered instead"""
+        if not self.auto:
+            return False
+        # Pages with real results are left alone without scanning their markup
+        if sum(len(result) for result in results.values()) >= AUTO_RENDER_MAX_TEXT:
+            return False
+        return looks_unrendered(html)
+
+    def render(self, url):
+        """Load url in a browser page and return (html, status_code, final_url); blocks the calling thread"""
+        future = asyncio.run_coroutine_threadsafe(self._render(url), self._start())
+        html, status_code, final_url = future.result()
+        with self._lock:
+            self.renders += 1
+        return html, status_code, final_url
+
+    def _start(self):
+        """Launch the browser and its event loop thread on first use"""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name='render-loop', daemon=True)
+                thread.start()
+                try:
+                    asyncio.run_coroutine_threadsafe(self._launch(), loop).result()
+                except BaseException:
+                    loop.call_soon_threadsafe(loop.stop)
+                    thread.join()
+                    loop.close()
+                    raise
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    async def _launch(self):
+        self._playwright = await async_playwright().start()
+        try:
+            self._browser = await self._playwright.chromium.launch(headless=True)
+        except BaseException:
+            await self._playwright.stop()
+            raise
+        self._slots = asyncio.Semaphore(self.max_pages)
+
+    async def _render(self, url):
+        async with self._slots:
+            slot = self._idle.pop() if self._idle else await self._new_page()
+            context, page = slot[0], slot[1]
+            try:
+                response = await page.goto(url, wait_until=self.wait_until, timeout=self.timeout * 1000)
+                html = await page.content()
+            except BaseException:
+                # A page that failed mid-navigation is not reused
+                await self._close_context(context)
+                raise
+            slot[2] += 1
+            if slot[2] >= self.pages_per_context:
+                await self._close_context(context)
+            else:
+                self._idle.append(slot)
+            return html, (response.status if response is not None else None), page.url
+
+    async def _new_page(self):
+        options = {'user_agent': self.user_agent} if self.user_agent else {}
+        context = await self._browser.new_context(**options)
+        if self.block_resources:
+            await context.route('**/*', self._route)
+        return [context, await context.new_page(), 0]
+
+    async def _route(self, route):
+        if route.request.resource_type in self.block_resources:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _close_context(self, context):
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    async def _shutdown(self):
+        idle, self._idle = self._idle, []
+        for context, _, _ in idle:
+            await self._close_context(context)
+        await self._browser.close()
+        await self._playwright.stop()
+
+    def close(self):
+        """Close the browser; a later render() launches a new one"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=self.timeout)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Request headers that change what the server sends back; part of the cache key
+NEGOTIATION_HEADERS = ('Accept', 'Accept-Language')
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.webscraper', 'cache')
+
+
+class ResponseCache:
+    """On-disk HTTP response cache revalidated with conditional GETs.
+
+    Bodies are stored as files next to a JSON index kept in LRU order.
+    Extracted results are stored per scrape mode so an unchanged page
+    (HTTP 304) needs neither a download nor a re-parse.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=200 * 1024 * 1024, max_age=7 * 24 * 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.index_path = os.path.join(directory, 'index.json')
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+        os.makedirs(directory, exist_ok=True)
+        self.index = self._load_index()
+        self.total_bytes = sum(entry['size'] for entry in self.index.values())
+
+    def _load_index(self):
+        """Load the index, dropping entries whose body file disappeared"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return OrderedDict()
+        
+        index = OrderedDict()
+        for key, entry in sorted(entries.items(), key=lambda item: item[1]['accessed']):
+            if os.path.exists(self._body_path(key)):
+                index[key] = entry
+        return index
+
+    def _body_path(self, key):
+        return os.path.join(self.directory, key + '.body')
+
+    def _results_path(self, key):
+        return os.path.join(self.directory, key + '.results.json')
+
+    def make_key(self, url, headers):
+        """Cache key from the URL and content-negotiation headers"""
+        parts = [url] + [f"{name}:{headers.get(name, '')}" for name in NEGOTIATION_HEADERS]
+        return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def lookup(self, key):
+        """Return the cached entry for a key, or None"""
+        with self._lock:
+            entry = self.index.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry['stored'] > self.max_age:
+                self._remove(key)
+                return None
+            return dict(entry)
+
+    def conditional_headers(self, entry):
+        """Revalidation headers for a cached entry"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def load_body(self, key):
+        """Read a cached body back as text"""
+        with open(self._body_path(key), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def load_result(self, key, mode):
+        """Cached extraction result for a scrape mode, or None"""
+        try:
+            with open(self._results_path(key), 'r', encoding='utf-8') as f:
+                return json.load(f).get(mode)
+        except (OSError, ValueError):
+            return None
+
+    def store(self, key, url, text, headers):
+        """Store a fresh response body; returns False if it is not cacheable"""
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return False
+        if 'no-store' in headers.get('Cache-Control', ''):
+            return False
+        
+        data = text.encode('utf-8')
+        with self._lock:
+            self._remove(key)
+            with open(self._body_path(key), 'wb') as f:
+                f.write(data)
+            now = time.time()
+            self.index[key] = {
+                'url': url,
+                'etag': etag,
+                'last_modified': last_modified,
+                'stored': now,
+                'accessed': now,
+                'size': len(data),
+            }
+            self.total_bytes += len(data)
+            self._evict()
+        return True
+
+    def store_result(self, key, mode, result):
+        """Attach an extraction result for a scrape mode to a cached entry"""
+        with self._lock:
+            entry = self.index.get(key)
+            if entry is None:
+                return
+            path = self._results_path(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    results = json.load(f)
+            except (OSError, ValueError):
+                results = {}
+            results[mode] = result
+            data = json.dumps(results).encode('utf-8')
+            with open(path, 'wb') as f:
+                f.write(data)
+            self.total_bytes += len(data) - entry.get('results_size', 0)
+            entry['size'] += len(data) - entry.get('results_size', 0)
+            entry['results_size'] = len(data)
+            self._evict()
+
+    def discard(self, key):
+        """Drop an entry whose response should not be revalidated later"""
+        with self._lock:
+            self._remove(key)
+
+    def touch(self, key, headers=None):
+        """Mark an entry as recently used after a successful revalidation"""
+        with self._lock:
+            entry = self.index.get(key)
+            if entry is None:
+                return
+            # A 304 confirms the stored body is current, so max_age counts from now
+            entry['stored'] = entry['accessed'] = time.time()
+            if headers:
+                entry['etag'] = headers.get('ETag') or entry['etag']
+                entry['last_modified'] = headers.get('Last-Modified') or entry['last_modified']
+            self.index.move_to_end(key)
+
+    def record(self, hit):
+        """Count a cache hit or miss"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def _remove(self, key):
+        """Drop an entry and its files (caller holds the lock)"""
+        entry = self.index.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry['size']
+        for path in (self._body_path(key), self._results_path(key)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict(self):
+        """Evict expired entries, then least recently used until under max_bytes"""
+        now = time.time()
+        for key in [key for key, entry in self.index.items() if now - entry['stored'] > self.max_age]:
+            self._remove(key)
+        while self.total_bytes > self.max_bytes and self.index:
+            self._remove(next(iter(self.index)))
+
+    def flush(self):
+        """Persist the index to disk"""
+        with self._lock:
+            tmp_path = self.index_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f)
+            os.replace(tmp_path, self.index_path)
@@ -0,0 +1,103 @@
+"""Failure classification and retry policy for fetches.
+
+Scraper.fetch_url records a failure's type in meta['error_type'];
+Scraper.fetch_urls consults a RetryPolicy to decide whether and when the
+URL is tried again.
+"""
+import random
+import socket
+
+import requests
+
+from http_session import ResponseTooLarge, UnsupportedContentType
+from politeness import RobotsDisallowed, THROTTLE_STATUS_CODES
+
+# Failure types, as stored in meta['error_type']
+TIMEOUT = 'timeout'
+DNS = 'dns'
+CONNECTION = 'connection'
+THROTTLED = 'throttled'
+SERVER_ERROR = 'server_error'
+CLIENT_ERROR = 'client_error'
+ROBOTS = 'robots'
+CONTENT_TYPE = 'content_type'
+TOO_LARGE = 'too_large'
+OTHER = 'other'
+
+# Failure types worth another try, now or when an interrupted job is resumed
+RETRYABLE = (TIMEOUT, CONNECTION, SERVER_ERROR, THROTTLED, DNS)
+
+# DNS failures are usually permanent (no such host), so they get a single extra try
+DNS_MAX_ATTEMPTS = 2
+
+
+def _exception_chain(exc):
+    """exc and the exceptions it wraps (requests -> urllib3 -> socket)"""
+    stack, seen = [exc], set()
+    while stack:
+        exc = stack.pop()
+        if exc is None or id(exc) in seen:
+            continue
+        seen.add(id(exc))
+        yield exc
+        # urllib3 keeps the underlying error in .reason; on ssl.SSLError it is a string
+        wrapped = [exc.__cause__, exc.__context__, getattr(exc, 'reason', None)] + list(exc.args)
+        stack.extend(e for e in wrapped if isinstance(e, BaseException))
+
+
+def classify_error(exc, status_code=None):
+    """Failure type of an exception raised while fetching a URL"""
+    if isinstance(exc, RobotsDisallowed):
+        return ROBOTS
+    if isinstance(exc, UnsupportedContentType):
+        return CONTENT_TYPE
+    if isinstance(exc, ResponseTooLarge):
+        return TOO_LARGE
+    if status_code is not None and status_code >= 400:
+        if status_code in THROTTLE_STATUS_CODES:
+            return THROTTLED
+        return SERVER_ERROR if status_code >= 500 else CLIENT_ERROR
+
+    chain = list(_exception_chain(exc))
+    # Matched by name too, so urllib3 and httpx exceptions need no imports
+    names = [type(e).__name__ for e in chain]
+    if any(isinstance(e, socket.gaierror) for e in chain) or 'NameResolutionError' in names:
+        return DNS
+    if any(isinstance(e, (requests.Timeout, socket.timeout)) for e in chain) or any('Timeout' in n for n in names):
+        return TIMEOUT
+    if any(isinstance(e, (requests.ConnectionError, ConnectionError)) for e in chain) \
+            or any(n in ('ProtocolError', 'ChunkedEncodingError', 'ConnectError', 'ReadError', 'RemoteProtocolError')
+                   for n in names):
+        return CONNECTION
+    return OTHER
+
+
+class RetryPolicy:
+    """Which failures are retried, how often, and after what delay.
+
+    Timeouts, connection failures, 5xx and throttling responses are tried
+    up to max_attempts times in total, DNS failures at most DNS_MAX_ATTEMPTS
+    times; 4xx, robots.txt and content errors are final. Delays grow
+    exponentially from base_delay up to max_delay with random jitter, so
+    URLs that failed together are not retried in lockstep.
+    """
+
+    retryable = RETRYABLE
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=30.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, error_type, attempt):
+        """Whether a URL that failed with error_type on its attempt-th try is tried again"""
+        if error_type not in self.retryable:
+            return False
+        limit = min(self.max_attempts, DNS_MAX_ATTEMPTS) if error_type == DNS else self.max_attempts
+        return attempt < limit
+
+    def delay(self, attempt):
+        """Seconds to wait before the next try after the attempt-th failure (equal jitter)"""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
@@ -0,0 +1,213 @@
+"""Headless command line front end for the scraper.
+
+    python scraper_cli.py urls.txt --mode links --mode images -c 16 -o out.jsonl
+
+Reads URLs from a text file (one per line; blank lines and # comments are
+skipped), a CSV file, a sitemap (.xml, .xml.gz, or a sitemap index) given
+as a file or URL, or stdin ('-'), and writes results as they complete.
+"""
+import sys
+import time
+import argparse
+
+from extractors import SCRAPE_MODES
+from exporters import EXPORTERS, format_for_path, open_exporter
+from parsers import available_backends
+from scraper_core import Scraper
+from politeness import DEFAULT_HOST_RATE
+from retry_policy import RetryPolicy
+from job_store import JobStore, DEFAULT_JOB_DB
+from crawler import Crawler
+from change_tracker import ChangeTracker, DEFAULT_CHANGES_DB, UNCHANGED
+from metrics import BatchStats, RunProfiler
+from link_index import LinkIndex
+from renderer import RenderPool, DEFAULT_RENDER_PAGES
+from http_session import DEFAULT_HEADERS, HttpClient
+from url_import import UrlImport
+
+
+def read_urls(source):
+    """URLs from a file object of one URL per line, normalized the same way as the GUI's add_url"""
+    importer = UrlImport()
+    importer.add_lines(source)
+    return importer.urls
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Fetch URLs and extract content without the GUI.")
+    parser.add_argument('urls', help="text file with one URL per line, CSV file, sitemap file or URL, or - for stdin")
+    parser.add_argument('-m', '--mode', action='append', choices=list(SCRAPE_MODES), dest='modes',
+                        help="content to extract; repeat for several (default: text)")
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help="parallel requests (default: 8)")
+    parser.add_argument('--per-host', type=int, default=2, help="parallel requests per host (default: 2)")
+    parser.add_argument('-p', '--parser', default='auto', choices=['auto'] + available_backends(),
+                        help="HTML parser backend (default: auto)")
+    parser.add_argument('-f', '--format', choices=list(EXPORTERS),
+                        help="output format (default: from the output file extension, else txt)")
+    parser.add_argument('-o', '--output', default='-', help="output file, - for stdout (default: -)")
+    parser.add_argument('--retries', type=int, default=2,
+                        help="extra attempts for timeouts, connection errors, 5xx and 429 (default: 2)")
+    parser.add_argument('--rate', type=float, default=DEFAULT_HOST_RATE,
+                        help=f"requests per second per host, 0 for no limit (default: {DEFAULT_HOST_RATE:g})")
+    parser.add_argument('--ignore-robots', action='store_true', help="fetch URLs disallowed by robots.txt")
+    parser.add_argument('--crawl', action='store_true', help="also fetch pages linked from the given URLs")
+    parser.add_argument('--depth', type=int, default=2, help="link hops to follow when crawling (default: 2)")
+    parser.add_argument('--max-pages', type=int, default=100, help="page limit when crawling (default: 100)")
+    parser.add_argument('--any-domain', action='store_true', help="let the crawl leave the start URLs' hosts")
+    parser.add_argument('--include', help="only crawl discovered URLs matching this regular expression")
+    parser.add_argument('--exclude', help="never crawl discovered URLs matching this regular expression")
+    parser.add_argument('--job', help="record progress under this job name; rerunning it skips finished URLs")
+    parser.add_argument('--job-db', default=DEFAULT_JOB_DB, help=f"job database (default: {DEFAULT_JOB_DB})")
+    parser.add_argument('--changes', action='store_true',
+                        help="compare with the previous run and output only what changed")
+    parser.add_argument('--changes-db', default=DEFAULT_CHANGES_DB,
+                        help=f"snapshot database for --changes (default: {DEFAULT_CHANGES_DB})")
+    parser.add_argument('--timings', metavar='FILE',
+                        help="write per-URL phase timings and latency/throughput statistics to a JSON file")
+    parser.add_argument('--profile', metavar='FILE', help="profile the run with cProfile and save the stats to FILE")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="trace allocations with tracemalloc and report the largest allocation sites")
+    parser.add_argument('--render-domain', action='append', dest='render_domains', metavar='DOMAIN', default=[],
+                        help="render pages on this domain (and its subdomains) in a headless browser; repeat for several")
+    parser.add_argument('--render-auto', action='store_true',
+                        help="render pages whose static HTML has scripts but almost no content (requires playwright)")
+    parser.add_argument('--render-pages', type=int, default=DEFAULT_RENDER_PAGES,
+                        help=f"browser pages rendering at once (default: {DEFAULT_RENDER_PAGES})")
+    parser.add_argument('--link-index', metavar='FILE',
+                        help="write every unique link and image of the run, with the pages using it, to a CSV file")
+    parser.add_argument('--link-domain', action='append', dest='link_domains', metavar='DOMAIN',
+                        help="with --link-index, only write links and images on this domain or its subdomains; repeat for several")
+    parser.add_argument('--no-cache', action='store_true', help="disable the on-disk response cache")
+    parser.add_argument('-q', '--quiet', action='store_true', help="no progress on stderr")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    modes = args.modes or ['text']
+
+    if args.urls == '-':
+        urls = read_urls(sys.stdin)
+    else:
+        http = HttpClient()
+        importer = UrlImport(http=http)
+        try:
+            importer.read(args.urls)
+        finally:
+            http.close()
+        urls = importer.urls
+        if not args.quiet:
+            for source, error in importer.errors:
+                print(f"Sitemap {source}: {error}", file=sys.stderr)
+            print(f"Imported {importer.summary()}", file=sys.stderr)
+    if not urls:
+        print("No URLs to fetch", file=sys.stderr)
+        return 1
+
+    renderer = None
+    if args.render_domains or args.render_auto:
+        try:
+            renderer = RenderPool(args.render_pages, args.render_domains, args.render_auto,
+                                  user_agent=DEFAULT_HEADERS['User-Agent'])
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return 2
+
+    exporter = open_exporter(args.format or format_for_path(args.output), args.output)
+    scraper = Scraper(cache=not args.no_cache, obey_robots=not args.ignore_robots, host_rate=args.rate or None,
+                      retry_policy=RetryPolicy(max_attempts=1 + max(0, args.retries)), renderer=renderer)
+    if args.changes:
+        scraper.change_tracker = ChangeTracker(args.changes_db)
+    crawler = None
+    if args.crawl:
+        crawler = Crawler(scraper, max(0, args.depth), args.max_pages, not args.any_domain, args.include, args.exclude)
+    store = job = None
+    if args.job:
+        store = JobStore(args.job_db)
+        job = store.open_job(args.job, urls, modes)
+    completed = failed = unchanged = 0
+    link_index = LinkIndex() if args.link_index else None
+    profiler = None
+    if args.profile or args.trace_memory:
+        profiler = RunProfiler(cpu=bool(args.profile), memory=args.trace_memory)
+        profiler.start()
+    start = time.perf_counter()
+    try:
+        if job is not None:
+            # The output gets the whole job: results stored by earlier runs first
+            for url, data, meta in job.iter_results():
+                if not meta['error']:
+                    exporter.write(url, data, meta)
+                    if link_index is not None:
+                        link_index.add_results(url, data)
+            # Final failures (robots.txt, content type, 4xx) stay as recorded; only retryable ones are fetched again
+            pending = job.pending()
+            if not crawler:
+                urls = [url for url, _ in pending]
+            if not args.quiet:
+                print(f"Job {args.job}: {job.count() - len(pending)} of {job.count()} URLs already fetched",
+                      file=sys.stderr)
+        total = args.max_pages if crawler else len(urls)
+        stats = BatchStats()
+        if crawler:
+            results = crawler.crawl(urls, modes, args.parser, max(1, args.concurrency), max(1, args.per_host), job)
+        else:
+            results = scraper.fetch_urls(urls, modes, args.parser, max(1, args.concurrency), max(1, args.per_host))
+        for completed, (url, data, meta) in enumerate(results, 1):
+            if job is not None:
+                job.record(url, data, meta)
+            changes = meta.pop('changes', None)
+            stats.add(url, meta)
+            if link_index is not None:
+                link_index.add_results(url, data)
+            failed += bool(meta['error'])
+            if changes is None:
+                exporter.write(url, data, meta)
+            elif changes.status == UNCHANGED:
+                unchanged += 1
+            else:
+                exporter.write(url, changes.delta_results(), meta)
+            if not args.quiet:
+                error = f" failed ({meta['error_type']}): {meta['error']}" if meta['error'] else ""
+                change = f" [{changes.summary()}]" if changes is not None else ""
+                print(f"[{completed}/{total}] {url}{change}{error}", file=sys.stderr)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        scraper.close()
+        exporter.close()
+        if store is not None:
+            store.close()
+        if scraper.change_tracker is not None:
+            scraper.change_tracker.close()
+        if renderer is not None:
+            renderer.close()
+
+    if args.timings:
+        stats.to_json(args.timings)
+    if link_index is not None:
+        rows = link_index.write_csv(args.link_index, args.link_domains)
+        if not args.quiet:
+            print(f"Link index: {link_index.summary()}; {rows} written to {args.link_index}", file=sys.stderr)
+    if profiler is not None:
+        if args.profile:
+            profiler.dump(args.profile)
+        print(profiler.report(), file=sys.stderr)
+
+    if not args.quiet:
+        # Cache stats are per fetch_urls batch, i.e. per crawl level, so a crawl reports its own totals
+        summary = crawler.summary() if crawler else scraper.cache_summary()
+        if args.changes:
+            summary = ", ".join(filter(None, [summary, f"{unchanged} unchanged since the last run"]))
+        if renderer is not None:
+            summary = ", ".join(filter(None, [summary, f"{renderer.renders} rendered"]))
+        print(f"Fetched {completed - failed} URLs, {failed} failed, in {time.perf_counter() - start:.2f}s"
+              + (f" ({summary})" if summary else ""), file=sys.stderr)
+        if completed:
+            latency = stats.summary()['latency']
+            print(f"Latency p50 {latency['p50']:.3f}s, p95 {latency['p95']:.3f}s", file=sys.stderr)
+    return 1 if failed and failed == completed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,386 @@
+"""GUI-free fetch and extract pipeline.
+
+Used by the Tk app and the command line; importing this module does not
+pull in tkinter or fpdf.
+"""
+import os
+import math
+import time
+import heapq
+import hashlib
+import itertools
+import threading
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+from http_session import (
+    HttpClient, ResponseTooLarge, DEFAULT_MAX_BODY_BYTES, CHUNK_SIZE, detect_encoding, decode_body
+)
+from response_cache import ResponseCache
+from politeness import (
+    RobotsCache, RobotsDisallowed, PolitenessScheduler, DEFAULT_HOST_RATE, THROTTLE_STATUS_CODES, parse_retry_after
+)
+from retry_policy import RetryPolicy, THROTTLED, classify_error
+from extractors import STREAMABLE_MODES, DISCOVERED_LINKS, StreamingExtractor, extract_timed
+from metrics import PhaseTimings, ROBOTS, TTFB, DOWNLOAD, RENDER, PARSE, EXTRACT, current_timings
+from renderer import RenderError
+
+# Pages smaller than this are parsed in the fetch thread; pickling them to a worker process costs more
+PROCESS_POOL_MIN_CHARS = 256 * 1024
+
+# Links/images-only fetches switch to streaming extraction once this much of the body is buffered
+STREAM_PARSE_MIN_BYTES = 1024 * 1024
+
+
+class Scraper:
+    """Fetches URLs concurrently and runs the selected extractors on each page.
+
+    Owns the pooled HTTP client, the response cache, the parse process pool
+    and the per-host politeness state, and reports results through plain
+    return values and generators.
+    """
+
+    def __init__(self, http=None, cache=True, parse_processes=None, max_body_bytes=DEFAULT_MAX_BODY_BYTES, timeout=10,
+                 obey_robots=True, host_rate=DEFAULT_HOST_RATE, retry_policy=None, change_tracker=None, renderer=None):
+        # Shared keep-alive connection pool for all fetches
+        self.http = http or HttpClient(pool_connections=50, pool_maxsize=64)
+        self.max_body_bytes = max_body_bytes
+        self.timeout = timeout
+
+        # Persistent response cache revalidated with conditional GETs
+        if cache is True:
+            try:
+                cache = ResponseCache()
+            except OSError:
+                cache = None
+        self.cache = cache or None
+
+        # robots.txt rules, per-host rate limits and 429/503 cooldowns; kept across batches
+        self.obey_robots = obey_robots
+        self.robots = RobotsCache(self.http, timeout=timeout)
+        self.scheduler = PolitenessScheduler(self.robots, host_rate)
+
+        # Which failures fetch_urls tries again, and after what backoff
+        self.retry_policy = retry_policy or RetryPolicy()
+
+        # Optional change_tracker.ChangeTracker comparing each page with the previous run
+        self.change_tracker = change_tracker
+
+        # Optional renderer.RenderPool for pages that only get their content from JavaScript
+        self.renderer = renderer
+
+        # Process pool so parsing large pages is not serialized by the GIL; created on first large page
+        self.parse_processes = parse_processes if parse_processes is not None else (os.cpu_count() or 1)
+        self._parse_pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_parse_pool(self):
+        """Start the parse process pool on first use (None when single-core)"""
+        if self._parse_pool is None and self.parse_processes > 1:
+            with self._pool_lock:
+                if self._parse_pool is None:
+                    self._parse_pool = ProcessPoolExecutor(
+                        max_workers=self.parse_processes,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return self._parse_pool
+
+    def fetch_urls(self, urls, modes, backend='auto', max_workers=8, per_host_limit=2, discover=False):
+        """Fetch URLs concurrently, yielding (url, results, meta) in completion order.
+
+        At most max_workers requests run at once and at most per_host_limit
+        of them against the same host. Requests to a host are paced by the
+        politeness scheduler; a host answering 429/503 is paused while the
+        other hosts keep going. Failures the retry policy allows are tried
+        again after a backoff, and only the final outcome is yielded, with
+        meta['attempts'] set. With discover=True each meta also carries the
+        page's absolute link targets under 'links'.
+        """
+        # Pending URLs grouped by host so no host gets more than per_host_limit connections
+        pending = OrderedDict()
+        for url in urls:
+            pending.setdefault(urlparse(url).netloc, deque()).append(url)
+        in_flight = {}
+        running = {}
+        attempts = {}
+        retries = []  # heap of (due time, sequence, host, url) waiting out their backoff
+        sequence = itertools.count()
+        scheduler = self.scheduler
+        scheduler.robots = self.robots if self.obey_robots else None
+        if self.cache is not None:
+            self.cache.reset_stats()
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                while pending or running or retries:
+                    # Retries whose backoff has passed go to the front of their host's queue
+                    now = time.monotonic()
+                    while retries and retries[0][0] <= now:
+                        _, _, host, url = heapq.heappop(retries)
+                        pending.setdefault(host, deque()).appendleft(url)
+                    next_ready = retries[0][0] - now if retries else math.inf
+
+                    # Hand out work to free slots, skipping hosts at their limit or not yet due
+                    for host in list(pending):
+                        host_urls = pending[host]
+                        while host_urls and len(running) < max_workers and in_flight.get(host, 0) < per_host_limit:
+                            if not scheduler.blocked(host_urls[0]):
+                                delay = scheduler.ready_in(host, host_urls[0], in_flight.get(host, 0), now)
+                                if delay > 0:
+                                    next_ready = min(next_ready, delay)
+                                    break
+                                scheduler.acquire(host, now)
+                            url = host_urls.popleft()
+                            future = executor.submit(self.fetch_url, url, modes, backend, discover)
+                            running[future] = (host, url)
+                            in_flight[host] = in_flight.get(host, 0) + 1
+                        if not host_urls:
+                            del pending[host]
+
+                    if not running:
+                        # Every remaining host is rate limited, cooling down or waiting to retry
+                        time.sleep(next_ready)
+                        continue
+                    done, _ = wait(running, timeout=None if next_ready == math.inf else next_ready,
+                                   return_when=FIRST_COMPLETED)
+                    for future in done:
+                        host, url = running.pop(future)
+                        in_flight[host] -= 1
+                        results, meta = future.result()
+                        meta['attempts'] = attempts[url] = attempts.get(url, 0) + 1
+                        if meta['error_type'] == THROTTLED:
+                            scheduler.throttled(host, meta.get('retry_after'))
+                        elif meta['status_code'] is not None:
+                            scheduler.succeeded(host)
+
+                        if meta['error_type'] and self.retry_policy.should_retry(meta['error_type'], meta['attempts']):
+                            # Throttled URLs wait on the host's cooldown instead of their own backoff
+                            delay = 0 if meta['error_type'] == THROTTLED else self.retry_policy.delay(meta['attempts'])
+                            heapq.heappush(retries, (time.monotonic() + delay, next(sequence), host, url))
+                            continue
+                        del attempts[url]
+                        yield url, results, meta
+        finally:
+            if self.cache is not None:
+                self.cache.flush()
+
+    def cache_summary(self):
+        """Hit/miss counts of the last batch, or '' without a cache"""
+        if self.cache is None:
+            return ""
+        return f"cache: {self.cache.hits} hits, {self.cache.misses} misses"
+
+    def fetch_url(self, url, modes, backend='auto', discover=False):
+        """Fetch a single URL and run every requested extractor on it.
+
+        Returns (results, meta): results maps each mode to its extracted text,
+        meta holds status_code, bytes, fetch_seconds, fetched_at, cached,
+        content_hash, timings (seconds per metrics.PHASES phase), rendered,
+        error and error_type, plus 'links' (absolute hrefs on the page)
+        when discover is set and 'changes' (a PageChanges) when a change
+        tracker is set. A failed fetch returns empty results; the failure is
+        described by meta['error'] (message) and meta['error_type'] (one of
+        the retry_policy failure types).
+
+        With a renderer, pages on its flagged domains (and with auto, static
+        pages that look like an unrendered shell) are extracted from the
+        browser-rendered DOM and are not cached.
+        """
+        timings = PhaseTimings()
+        meta = {
+            'status_code': None,
+            'bytes': 0,
+            'fetch_seconds': None,
+            'fetched_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'cached': False,
+            'rendered': False,
+            'content_hash': None,
+            'timings': timings.seconds,
+            'error': None,
+            'error_type': None,
+        }
+        if discover:
+            meta['links'] = []
+        # Discovered links are cached alongside the mode results so 304s can still feed a crawl
+        wanted = list(modes) + [DISCOVERED_LINKS] if discover else list(modes)
+        start = time.perf_counter()
+        timings.activate()
+        try:
+            if self.obey_robots:
+                with timings.phase(ROBOTS):
+                    allowed = self.robots.can_fetch(url)
+                if not allowed:
+                    raise RobotsDisallowed("Disallowed by robots.txt")
+            if self.renderer is not None and self.renderer.flagged(url):
+                return self._finish(url, modes, self._render(url, modes, backend, discover, meta), meta, start, discover)
+
+            cache_key = entry = None
+            if self.cache is not None:
+                cache_key = self.cache.make_key(url, self.http.headers)
+                entry = self.cache.lookup(cache_key)
+
+            while True:
+                results = OrderedDict()
+                request_start = time.perf_counter()
+                with self.http.open(
+                    url,
+                    headers=self.cache.conditional_headers(entry) if entry else None,
+                    timeout=self.timeout
+                ) as response:
+                    # Time to the response headers, less any connection setup
+                    timings.add(TTFB, time.perf_counter() - request_start - timings.connection_seconds())
+                    meta['status_code'] = response.status_code
+                    if response.status_code in THROTTLE_STATUS_CODES:
+                        meta['retry_after'] = parse_retry_after(response.headers.get('Retry-After'))
+                    if entry and response.status_code == 304:
+                        # Unchanged since last fetch: reuse stored results, parsing the body only for missing modes
+                        for mode in wanted:
+                            result = self.cache.load_result(cache_key, mode)
+                            if result is not None:
+                                results[mode] = result
+                        missing = [mode for mode in modes if mode not in results]
+                        rediscover = discover and DISCOVERED_LINKS not in results
+                        if missing or rediscover:
+                            try:
+                                body = self.cache.load_body(cache_key)
+                            except FileNotFoundError:
+                                # Evicted by another thread since the lookup: fetch the page again in full
+                                self.cache.discard(cache_key)
+                                entry = None
+                                continue
+                            results.update(self._extract(body, url, missing, backend, rediscover))
+                        self.cache.record(hit=True)
+                        self.cache.touch(cache_key, response.headers)
+                        meta['cached'] = True
+                    else:
+                        response.raise_for_status()
+                        response.check_content_type()
+                        if self.cache is not None:
+                            self.cache.record(hit=False)
+
+                        with timings.phase(DOWNLOAD):
+                            # Includes the streaming extraction of pages too large to buffer
+                            html, streamed, meta['bytes'], meta['content_hash'] = self._read_response(
+                                response, url, modes, discover
+                            )
+                        if streamed is not None:
+                            # Too large to keep; extracted while streaming and not cached
+                            results.update(streamed)
+                            cache_key = None
+                        else:
+                            if cache_key is not None and not self.cache.store(cache_key, url, html, response.headers):
+                                cache_key = None
+                            previous = None
+                            if self.change_tracker is not None and not discover:
+                                previous = self.change_tracker.unchanged_results(url, meta['content_hash'], modes)
+                            if previous is not None:
+                                # Same body as the last run, so its results still hold
+                                results.update(previous)
+                            else:
+                                results.update(self._extract(html, url, modes, backend, discover))
+                                if self.renderer is not None and self.renderer.should_render(html, results):
+                                    # Content comes from scripts; the static body and results would only mislead a 304
+                                    if cache_key is not None:
+                                        self.cache.discard(cache_key)
+                                        cache_key = None
+                                    results = self._render(url, modes, backend, discover, meta)
+                break
+
+            if cache_key is not None:
+                for mode, result in results.items():
+                    self.cache.store_result(cache_key, mode, result)
+            return self._finish(url, modes, results, meta, start, discover)
+
+        except Exception as e:
+            meta['fetch_seconds'] = round(time.perf_counter() - start, 4)
+            meta['error'] = str(e)
+            meta['error_type'] = classify_error(e, meta['status_code'])
+            return OrderedDict(), meta
+        finally:
+            timings.deactivate()
+
+    def _finish(self, url, modes, results, meta, start, discover):
+        """Order a page's results by mode and fill in the remaining meta"""
+        if discover:
+            meta['links'] = results.pop(DISCOVERED_LINKS, [])
+        results = OrderedDict((mode, results[mode]) for mode in modes)
+        if self.change_tracker is not None:
+            meta['changes'] = self.change_tracker.compare(url, results, meta['content_hash'])
+        meta['fetch_seconds'] = round(time.perf_counter() - start, 4)
+        return results, meta
+
+    def _render(self, url, modes, backend, discover, meta):
+        """Load a page in the renderer's browser and extract from the rendered DOM"""
+        with current_timings().phase(RENDER):
+            html, meta['status_code'], _ = self.renderer.render(url)
+        meta['rendered'] = True
+        if meta['status_code'] is not None and meta['status_code'] >= 400:
+            raise RenderError(f"{meta['status_code']} Error for rendered url: {url}")
+        body = html.encode('utf-8')
+        meta['bytes'] = len(body)
+        meta['content_hash'] = hashlib.blake2b(body, digest_size=16).hexdigest()
+        return self._extract(html, url, modes, backend, discover)
+
+    def _read_response(self, response, url, modes, discover=False):
+        """Read a streamed body with bounded memory.
+
+        Returns (html, None, bytes_read, content_hash) for normal pages.
+        Fetches of large pages for STREAMABLE_MODES only are handed to a StreamingExtractor
+        instead and return (None, results, bytes_read, content_hash); those are cut
+        off at max_body_bytes rather than failing.
+        """
+        streamable = all(mode in STREAMABLE_MODES for mode in modes)
+        length = response.content_length
+        if not streamable and length is not None and length > self.max_body_bytes:
+            raise ResponseTooLarge(f"Response body of {length} bytes exceeds {self.max_body_bytes} byte limit")
+
+        body = bytearray()
+        stream = None
+        received = 0
+        digest = hashlib.blake2b(digest_size=16)
+        for chunk in response.iter_bytes(CHUNK_SIZE):
+            received += len(chunk)
+            digest.update(chunk)
+            if received > self.max_body_bytes:
+                if stream is None:
+                    raise ResponseTooLarge(f"Response body exceeds {self.max_body_bytes} byte limit")
+                break
+
+            if stream is not None:
+                stream.feed_bytes(chunk)
+                continue
+            body += chunk
+            if streamable and len(body) >= STREAM_PARSE_MIN_BYTES:
+                stream = StreamingExtractor(url, detect_encoding(response, bytes(body[:CHUNK_SIZE])), modes)
+                stream.feed_bytes(bytes(body))
+                body = None
+
+        if stream is not None:
+            return None, stream.results(modes, discover), received, digest.hexdigest()
+        html = decode_body(bytes(body), detect_encoding(response, bytes(body)))
+        return html, None, received, digest.hexdigest()
+
+    def _extract(self, html, url, modes, backend, discover=False):
+        """Parse a page and run the extractors, using the process pool for large pages"""
+        parse_pool = self._get_parse_pool()
+        if parse_pool is not None and len(html) >= PROCESS_POOL_MIN_CHARS:
+            results, parse_seconds, extract_seconds = parse_pool.submit(
+                extract_timed, html, url, modes, backend, discover
+            ).result()
+        else:
+            results, parse_seconds, extract_seconds = extract_timed(html, url, modes, backend, discover)
+        timings = current_timings()
+        if timings is not None:
+            timings.add(PARSE, parse_seconds)
+            timings.add(EXTRACT, extract_seconds)
+        return results
+
+    def close(self):
+        """Release pooled connections and worker processes"""
+        self.http.close()
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown()
+            self._parse_pool = None
@@ -0,0 +1,485 @@
+"""Table extraction in a single pass over the markup.
+
+TableBuilder turns start tag / end tag / text events into tables: rows
+of nested tables go to the nested table only (the enclosing cell gets a
+"[table N]" reference), colspan/rowspan are expanded so every row has its
+cells in the right columns, and omitted </td>, </tr> and section end tags
+are closed implicitly like browsers do. Rows can be handed to a callback
+as soon as they are complete, so huge tables need not be held in memory.
+
+The tables result text keeps its "=== TABLE n ===" layout with cells
+joined by " | "; a "|" inside a cell is written as "\\|" so parse_tables()
+can split the text back into the exact cells.
+"""
+import re
+from html.parser import HTMLParser
+
+from bs4 import Tag, NavigableString, CData
+
+from parsers import NON_TEXT_TAGS
+
+try:
+    import pandas
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+# Span limits from the HTML spec; rowspan=0 spans the rest of its row group
+MAX_COLSPAN = 1000
+MAX_ROWSPAN = 65534
+
+CELL_SEPARATOR = " | "
+
+SECTION_TAGS = ('thead', 'tbody', 'tfoot')
+CELL_TAGS = ('td', 'th')
+
+# BeautifulSoup strings that get_text() returns; Script, Stylesheet, TemplateString and Comment are left out
+TEXT_STRING_TYPES = (NavigableString, CData)
+
+INT_PATTERN = re.compile(r'[+-]?\d{1,3}(?:,\d{3})+|[+-]?\d+')
+FLOAT_PATTERN = re.compile(r'[+-]?(?:\d{1,3}(?:,\d{3})+|\d+)?\.\d+(?:[eE][+-]?\d+)?|[+-]?\d+[eE][+-]?\d+')
+
+
+class Table:
+    """One extracted table: 1-based number in document order, enclosing table number or None, rows of cell texts"""
+    __slots__ = ('index', 'parent', 'caption', 'header', 'rows')
+
+    def __init__(self, index, parent=None):
+        self.index = index
+        self.parent = parent
+        self.caption = None
+        self.header = None  # leading row made only of <th> cells, also the first of rows
+        self.rows = []
+
+
+class _OpenTable:
+    """Build state of a table whose end has not been reached yet"""
+    __slots__ = ('table', 'spans', 'row', 'row_headers', 'row_plain', 'cell', 'cell_header', 'colspan', 'rowspan',
+                 'caption', 'row_count')
+
+    def __init__(self, table):
+        self.table = table
+        self.spans = {}  # column -> [rows left, text] of cells spanning down from earlier rows
+        self.row = None  # (text, colspan, rowspan) of the open row's cells
+        self.row_headers = True  # every cell of the open row is a <th>
+        self.row_plain = True  # no cell of the open row spans
+        self.cell = None  # text parts of the open cell (event API)
+        self.cell_header = False
+        self.colspan = self.rowspan = 1
+        self.caption = None  # text parts while inside <caption>
+        self.row_count = 0
+
+
+def _span(value, limit, zero):
+    if value is None:
+        return 1
+    try:
+        span = int(value)
+    except (TypeError, ValueError):
+        return 1
+    if span == 0:
+        return zero
+    return min(max(span, 1), limit)
+
+
+def escape_cell(text):
+    return text.replace("|", "\\|")
+
+
+def unescape_cell(text):
+    return text.replace("\\|", "|")
+
+
+class TableBuilder:
+    """Builds Tables from a walk over table markup.
+
+    Tree walkers call open_table/start_section/start_row/add_cell and the
+    matching ends; tokenizers call start(tag, attrs), end(tag) and
+    data(text), which close omitted end tags. on_row(table, cells) is
+    called for every completed row. With keep_rows=False the rows are not
+    stored on the Table afterwards, so memory use does not grow with the table.
+    """
+
+    def __init__(self, on_row=None, keep_rows=True):
+        self.on_row = on_row
+        self.keep_rows = keep_rows
+        self.tables = []
+        self._open = []
+
+    def open_table(self):
+        parent = self._open[-1] if self._open else None
+        table = Table(len(self.tables) + 1, parent.table.index if parent else None)
+        self.tables.append(table)
+        if parent is not None and parent.cell is not None:
+            parent.cell.append(f" [table {table.index}] ")
+        self._open.append(_OpenTable(table))
+        return table
+
+    def close_table(self):
+        self._close_row(self._open[-1])
+        self._open.pop()
+
+    def start_section(self):
+        """A thead/tbody/tfoot starts or ends; rowspans do not cross it"""
+        state = self._open[-1]
+        self._close_row(state)
+        state.spans.clear()
+
+    def start_row(self):
+        state = self._open[-1]
+        self._close_row(state)
+        state.row, state.row_headers, state.row_plain = [], True, True
+
+    def end_row(self):
+        self._close_row(self._open[-1])
+
+    def add_cell(self, text, colspan=None, rowspan=None, header=False):
+        """Add a cell to the open row; colspan/rowspan are the raw attribute values"""
+        state = self._open[-1]
+        if state.row is None:
+            state.row, state.row_headers, state.row_plain = [], True, True
+        colspan = _span(colspan, MAX_COLSPAN, 1)
+        rowspan = _span(rowspan, MAX_ROWSPAN, MAX_ROWSPAN)
+        state.row.append((" ".join(text.split()), colspan, rowspan))
+        state.row_headers = state.row_headers and header
+        state.row_plain = state.row_plain and colspan == rowspan == 1
+
+    def set_caption(self, text):
+        self._open[-1].table.caption = " ".join(text.split())
+
+    def start(self, tag, attrs):
+        if tag == 'table':
+            self.open_table()
+            return
+        if not self._open:
+            return
+        state = self._open[-1]
+        if tag in CELL_TAGS:
+            self._close_cell(state)
+            attrs = dict(attrs)
+            state.cell = []
+            state.cell_header = tag == 'th'
+            state.colspan, state.rowspan = attrs.get('colspan'), attrs.get('rowspan')
+        elif tag == 'tr':
+            self.start_row()
+        elif tag in SECTION_TAGS:
+            self.start_section()
+        elif tag == 'caption':
+            state.caption = []
+
+    def end(self, tag):
+        if not self._open:
+            return
+        state = self._open[-1]
+        if tag == 'table':
+            self.close_table()
+        elif tag in CELL_TAGS:
+            self._close_cell(state)
+        elif tag == 'tr':
+            self._close_row(state)
+        elif tag in SECTION_TAGS:
+            self.start_section()
+        elif tag == 'caption' and state.caption is not None:
+            self.set_caption("".join(state.caption))
+            state.caption = None
+
+    def data(self, text):
+        if self._open:
+            state = self._open[-1]
+            if state.cell is not None:
+                state.cell.append(text)
+            elif state.caption is not None:
+                state.caption.append(text)
+
+    def close(self):
+        """Close tables left open at the end of the document"""
+        while self._open:
+            self.close_table()
+        return self.tables
+
+    def _close_cell(self, state):
+        if state.cell is None:
+            return
+        parts, state.cell = state.cell, None
+        self.add_cell("".join(parts), state.colspan, state.rowspan, state.cell_header)
+
+    def _close_row(self, state):
+        self._close_cell(state)
+        row, spans = state.row, state.spans
+        if row is None:
+            return
+        state.row = None
+        if state.row_plain and not spans:
+            cells = [cell[0] for cell in row]
+        else:
+            cells = []
+
+            def fill_spans():
+                while len(cells) in spans:
+                    span = spans[len(cells)]
+                    cells.append(span[1])
+                    span[0] -= 1
+                    if not span[0]:
+                        del spans[len(cells) - 1]
+
+            for text, colspan, rowspan in row:
+                fill_spans()
+                for _ in range(colspan):
+                    if rowspan > 1:
+                        spans[len(cells)] = [rowspan - 1, text]
+                    cells.append(text)
+            # Cells spanning down into columns past this row's last cell
+            for column in sorted(column for column in spans if column >= len(cells)):
+                cells.extend([""] * (column - len(cells)))
+                fill_spans()
+        if not cells:
+            return
+
+        table = state.table
+        if state.row_headers and row and state.row_count == 0:
+            table.header = cells
+        state.row_count += 1
+        if self.keep_rows:
+            table.rows.append(cells)
+        if self.on_row is not None:
+            self.on_row(table, cells)
+
+
+class TableParser(HTMLParser):
+    """Standalone tokenizer feeding a TableBuilder; accepts the markup in pieces"""
+
+    def __init__(self, on_row=None, keep_rows=True):
+        super().__init__(convert_charrefs=True)
+        self.builder = TableBuilder(on_row, keep_rows)
+        self._non_text = 0  # depth inside <script>/<style>/<template>
+
+    def handle_starttag(self, tag, attrs):
+        if tag in NON_TEXT_TAGS:
+            self._non_text += 1
+        self.builder.start(tag, attrs)
+
+    def handle_startendtag(self, tag, attrs):
+        self.builder.start(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in NON_TEXT_TAGS and self._non_text:
+            self._non_text -= 1
+        self.builder.end(tag)
+
+    def handle_data(self, data):
+        if not self._non_text:
+            self.builder.data(data)
+
+    def close(self):
+        super().close()
+        return self.builder.close()
+
+
+def _read_table(builder, node, nested):
+    """Feed one table of a parsed document to builder; nested are its descendant <table> nodes"""
+    builder.open_table()
+    for child in node.find_all(('caption', 'thead', 'tbody', 'tfoot', 'tr'), recursive=False):
+        name = child.name
+        if name == 'tr':
+            _read_row(builder, child, nested)
+        elif name == 'caption':
+            builder.set_caption(child.get_text())
+        else:
+            builder.start_section()
+            for row in child.find_all('tr', recursive=False):
+                _read_row(builder, row, nested)
+            builder.start_section()
+    builder.close_table()
+
+
+def _read_row(builder, row, nested):
+    builder.start_row()
+    for cell in row.find_all(CELL_TAGS, recursive=False):
+        attrs = cell.attrs
+        colspan, rowspan = (attrs.get('colspan'), attrs.get('rowspan')) if attrs else (None, None)
+        text = cell.get_text()
+        inner = cell.find_all('table') if nested else ()
+        if inner:
+            # The cell's own text goes around "[table N]" references; the nested tables are read in place
+            state = builder._open[-1]
+            state.cell, state.cell_header, state.colspan, state.rowspan = [], cell.name == 'th', colspan, rowspan
+            position = 0
+            for table, table_nested in _outermost(inner):
+                table_text = table.get_text()
+                found = text.find(table_text, position)
+                if found >= 0:
+                    builder.data(text[position:found])
+                    position = found + len(table_text)
+                _read_table(builder, table, table_nested)
+            builder.data(text[position:])
+            builder.end(cell.name)
+        else:
+            builder.add_cell(text, colspan, rowspan, cell.name == 'th')
+    builder.end_row()
+
+
+def _outermost(tables):
+    """(table, its descendant tables) for the tables of a document-order list that are not inside another"""
+    index = 0
+    while index < len(tables):
+        nested = tables[index].find_all('table')
+        yield tables[index], nested
+        # A table's descendant tables directly follow it in document order
+        index += 1 + len(nested)
+
+
+def read_tables(table_nodes):
+    """Tables from the <table> nodes of a parsed document (any parsers backend), in document order.
+
+    table_nodes is every <table> in the document, nested ones included, as
+    find_all('table') returns them; each is walked once, row by row.
+    """
+    builder = TableBuilder()
+    for table, nested in _outermost(list(table_nodes)):
+        _read_table(builder, table, nested)
+    return builder.close()
+
+
+def _replay_table(builder, table):
+    """Feed a BeautifulSoup <table> subtree to builder as start/end/data events, in document order"""
+    builder.start(table.name, table.attrs.items())
+    names, children = [table.name], [iter(table.contents)]
+    # Iterative: without omitted </td>/</tr> closed, html.parser nests every later row in the open cell
+    while children:
+        child = next(children[-1], None)
+        if child is None:
+            children.pop()
+            builder.end(names.pop())
+        elif isinstance(child, Tag):
+            builder.start(child.name, child.attrs.items())
+            names.append(child.name)
+            children.append(iter(child.contents))
+        elif type(child) in TEXT_STRING_TYPES:
+            builder.data(child)
+
+
+def replay_tables(table_nodes):
+    """Tables from the <table> nodes of a BeautifulSoup tree that leaves omitted end tags open.
+
+    Walking such a tree row by row would put later rows inside the open
+    cell, so the tables' subtrees are replayed as tag events instead and
+    TableBuilder closes omitted </td>/</tr> as it does for raw markup. The
+    document is not tokenized a second time.
+    """
+    builder = TableBuilder()
+    for table, _ in _outermost(list(table_nodes)):
+        _replay_table(builder, table)
+    return builder.close()
+
+
+def extract_tables(html):
+    """Every table in an HTML document, nested tables included, in document order"""
+    parser = TableParser()
+    parser.feed(html)
+    return parser.close()
+
+
+def iter_table_rows(chunks):
+    """Yield (table, cells) for each row as soon as it is parsed from an iterable of str chunks"""
+    rows = []
+    parser = TableParser(on_row=lambda table, cells: rows.append((table, cells)), keep_rows=False)
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from rows
+        rows.clear()
+    parser.close()
+    yield from rows
+
+
+def format_row(cells):
+    return CELL_SEPARATOR.join(escape_cell(cell) for cell in cells)
+
+
+def format_tables(tables, lines=None):
+    """Result text of Tables: each table's heading followed by one line per row.
+
+    lines maps table numbers to already formatted rows, for Tables built with keep_rows=False.
+    """
+    parts = []
+    for table in tables:
+        parts.append(f"\n=== TABLE {table.index} ===\n")
+        parts.extend(lines.get(table.index, ()) if lines is not None else map(format_row, table.rows))
+        parts.append("\n")
+    return "\n".join(parts)
+
+
+def parse_tables(result):
+    """Tables (index and rows only) back from a tables result text"""
+    tables = []
+    for line in result.split("\n"):
+        if line.startswith("=== TABLE ") and line.endswith(" ==="):
+            tables.append(Table(int(line[len("=== TABLE "):-len(" ===")])))
+        elif line and tables:
+            tables[-1].rows.append([unescape_cell(cell) for cell in line.split(CELL_SEPARATOR)])
+    return tables
+
+
+def parse_value(text):
+    """int or float for numeric cell text (thousands separators allowed), else the text; '' becomes None"""
+    text = text.strip()
+    if not text:
+        return None
+    if INT_PATTERN.fullmatch(text):
+        return int(text.replace(",", ""))
+    if FLOAT_PATTERN.fullmatch(text):
+        return float(text.replace(",", ""))
+    return text
+
+
+def column_types(rows):
+    """'int', 'float' or 'text' for each column, from the values of every row"""
+    width = max((len(row) for row in rows), default=0)
+    types = []
+    for column in range(width):
+        kinds = set()
+        for row in rows:
+            if column < len(row):
+                value = parse_value(row[column])
+                if value is not None:
+                    kinds.add(type(value))
+        if kinds and kinds <= {int}:
+            types.append('int')
+        elif kinds and kinds <= {int, float}:
+            types.append('float')
+        else:
+            types.append('text')
+    return types
+
+
+def typed_rows(table):
+    """The table's body rows (header excluded) with numeric columns converted to int/float and blanks to None"""
+    rows = table.rows[1:] if table.header is not None else table.rows
+    types = column_types(rows)
+    converters = {'int': parse_value, 'float': lambda text: _float(parse_value(text))}
+    typed = []
+    for row in rows:
+        typed.append([
+            converters[types[column]](value) if types[column] in converters else value
+            for column, value in enumerate(row)
+        ])
+    return typed
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+def to_dataframe(table):
+    """pandas DataFrame of a table with numeric columns inferred (requires pandas)"""
+    if not PANDAS_AVAILABLE:
+        raise RuntimeError("DataFrame output requires pandas (pip install pandas)")
+    rows = typed_rows(table)
+    width = max([len(row) for row in rows] + [len(table.header or ())], default=0)
+    header = list(table.header or []) + [""] * width
+    columns, seen = [], {}
+    for index in range(width):
+        # Header cells repeated by colspan or left empty still need unique column names
+        name = header[index] or f"column_{index + 1}"
+        seen[name] = seen.get(name, 0) + 1
+        columns.append(name if seen[name] == 1 else f"{name}_{seen[name]}")
+    return pandas.DataFrame([row + [None] * (width - len(row)) for row in rows], columns=columns)
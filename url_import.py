@@ -0,0 +1,284 @@
+"""Bulk URL import from text, CSV and sitemap files.
+
+Sources are read in chunks: text and CSV files line by line, sitemaps
+(plain or gzip-compressed, <urlset> or <sitemapindex>) with an
+incremental XML parser, so even a sitemap of millions of URLs is never
+held as a document. Child sitemaps of an index are fetched through an
+HttpClient. Every candidate is validated and normalized with
+url_utils.normalize_url, and duplicates are dropped with set lookups.
+"""
+import re
+import io
+import csv
+import zlib
+from itertools import chain
+from functools import partial
+from urllib.parse import urlsplit
+from xml.etree.ElementTree import XMLParser, ParseError
+
+from url_utils import normalize_url
+
+# Sitemaps read at most per import, and how deeply sitemap indexes may nest
+MAX_SITEMAPS = 1000
+MAX_SITEMAP_DEPTH = 3
+
+READ_CHUNK = 64 * 1024
+
+# Header names of the URL column in CSV files; without one, the first column holding a URL-like cell is used
+URL_COLUMNS = ('url', 'urls', 'link', 'href', 'loc', 'address', 'page')
+# Rows looked at to find that column before falling back to the first one
+CSV_DETECT_ROWS = 100
+
+# Source formats
+TEXT = 'text'
+CSV = 'csv'
+SITEMAP = 'sitemap'
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+# Only the sitemap protocol's own <loc> elements count; image/video extensions have their own namespaces
+SITEMAP_NAMESPACES = ('', '{http://www.sitemaps.org/schemas/sitemap/0.9}')
+
+HOST_PATTERN = re.compile(r'[\w.-]+|\[[0-9a-f:.]+\]')
+SPACE_PATTERN = re.compile(r'\s')
+# A cell that is clearly meant as a URL: an explicit http(s) scheme, or a dotted host ending in a letter TLD
+URL_LIKE_PATTERN = re.compile(r'https?://\S+|[\w-]+(\.[\w-]+)*\.[a-z][a-z0-9-]*(:\d+)?([/?#]\S*)?', re.IGNORECASE)
+# Already normalized: lowercase scheme and host, no userinfo or port, a path, no fragment or empty query
+CANONICAL_PATTERN = re.compile(r'https?://[a-z0-9.-]+/[^\s\x00-\x1f\x7f#?]*(\?[^\s\x00-\x1f\x7f#]+)?')
+
+
+def clean_url(candidate):
+    """Validated, normalized form of a URL as typed or listed, or None; a missing scheme means https"""
+    candidate = candidate.strip()
+    if not candidate or candidate.startswith('#') or SPACE_PATTERN.search(candidate):
+        return None
+    if not candidate.lower().startswith(('http://', 'https://')):
+        if '://' in candidate:
+            return None
+        candidate = 'https://' + candidate
+    if CANONICAL_PATTERN.fullmatch(candidate):
+        # Most bulk lists are; skips parsing the URL twice
+        return candidate
+    url = normalize_url(candidate)
+    if url is None or not HOST_PATTERN.fullmatch(urlsplit(url).hostname or ''):
+        return None
+    return url
+
+
+def detect_format(name, head):
+    """TEXT, CSV or SITEMAP from a file name or URL and the first bytes of its content"""
+    name = name.lower()
+    if head[:2] == GZIP_MAGIC or name.endswith(('.xml', '.xml.gz')):
+        return SITEMAP
+    if name.endswith('.csv'):
+        return CSV
+    if head.lstrip(b'\xef\xbb\xbf \t\r\n')[:1] == b'<':
+        return SITEMAP
+    return TEXT
+
+
+def looks_like_url(cell):
+    """Whether a CSV cell is written as a URL, as opposed to a name or label clean_url would accept"""
+    return URL_LIKE_PATTERN.fullmatch(cell.strip()) is not None
+
+
+def iter_csv_cells(lines):
+    """The URL cell of each CSV row, from one column for the whole file.
+
+    The column is the one whose header is a URL_COLUMNS name, or else the
+    first column holding a URL-like cell in the first rows; a first row
+    without one is taken as a header.
+    """
+    rows = csv.reader(lines)
+    header = next(rows, None)
+    if header is None:
+        return
+    names = [cell.strip().lower() for cell in header]
+    column = next((names.index(name) for name in URL_COLUMNS if name in names), None)
+    pending = []
+    if column is None:
+        # Rows are held back until the column is known
+        pending = [header] if any(looks_like_url(cell) for cell in header) else []
+        for row in rows:
+            pending.append(row)
+            if any(looks_like_url(cell) for cell in row) or len(pending) >= CSV_DETECT_ROWS:
+                break
+        column = next((index for row in pending for index, cell in enumerate(row) if looks_like_url(cell)), 0)
+    for row in chain(pending, rows):
+        # A row too short to have the column counts as an empty cell
+        yield row[column] if column < len(row) else ''
+
+
+class _LocTarget:
+    """XMLParser target keeping the text of <loc> elements two levels below the root"""
+
+    def __init__(self):
+        self.index = False  # the root is <sitemapindex>, so the locs are child sitemaps
+        self.depth = 0
+        self.locs = []
+        self._text = None  # chunks of the <loc> being read
+
+    def start(self, tag, attrib):
+        self.depth += 1
+        if self.depth == 1:
+            self.index = tag.endswith('sitemapindex')
+        elif self.depth == 3 and tag.endswith('loc') and tag[:-3] in SITEMAP_NAMESPACES:
+            self._text = []
+
+    def data(self, text):
+        if self._text is not None:
+            self._text.append(text)
+
+    def end(self, tag):
+        if self._text is not None and self.depth == 3:
+            loc = ''.join(self._text).strip()
+            if loc:
+                self.locs.append(loc)
+            self._text = None
+        self.depth -= 1
+
+    def close(self):
+        pass
+
+
+class SitemapParser:
+    """Incremental reader of the <loc> values of a sitemap or sitemap index, gzip-compressed or not.
+
+    The XML parser calls back into a target instead of building elements,
+    so memory stays flat however long the file is.
+    """
+
+    def __init__(self):
+        self.target = _LocTarget()
+        self.parser = XMLParser(target=self.target)
+        self.decompressor = None
+        self.started = False
+
+    @property
+    def index(self):
+        return self.target.index
+
+    def feed(self, chunk):
+        """Parse the next bytes; returns the <loc> values they completed"""
+        if not self.started:
+            self.started = True
+            if chunk[:2] == GZIP_MAGIC:
+                self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self.decompressor is not None:
+            chunk = self.decompressor.decompress(chunk)
+        self.parser.feed(chunk)
+        return self._take()
+
+    def close(self):
+        """Finish parsing; raises ParseError for a truncated or malformed document"""
+        if self.decompressor is not None:
+            self.parser.feed(self.decompressor.flush())
+        self.parser.close()
+        return self._take()
+
+    def _take(self):
+        locs, self.target.locs = self.target.locs, []
+        return locs
+
+
+class UrlImport:
+    """New, validated and normalized URLs read from files, sitemap URLs or lines of text.
+
+    known holds the URLs already present (a set or dict, for O(1)
+    lookups); they and repeats within the import are counted as
+    duplicates. http is the HttpClient used for sitemap URLs and the
+    child sitemaps of an index; without one, indexes are not followed.
+    """
+
+    def __init__(self, known=(), http=None, max_sitemaps=MAX_SITEMAPS):
+        self.known = known
+        self.http = http
+        self.max_sitemaps = max_sitemaps
+        self.urls = []
+        self.seen = set()
+        self.duplicates = 0
+        self.invalid = 0
+        self.sitemaps = 0
+        self.errors = []  # (source, message) of sitemaps that could not be read or were not followed
+        self._visited = set()
+
+    def add(self, candidate):
+        """Add one URL as typed or listed; returns the normalized URL if it was new"""
+        url = clean_url(candidate)
+        if url is None:
+            stripped = candidate.strip()
+            self.invalid += bool(stripped) and not stripped.startswith('#')
+            return None
+        if url in self.seen or url in self.known:
+            self.duplicates += 1
+            return None
+        self.seen.add(url)
+        self.urls.append(url)
+        return url
+
+    def add_lines(self, lines):
+        for line in lines:
+            self.add(line)
+
+    def read(self, source):
+        """Import a local file (text, CSV or sitemap) or a sitemap URL"""
+        if source.lower().startswith(('http://', 'https://')):
+            self._fetch_sitemap(source, 0)
+            return
+        with open(source, 'rb') as f:
+            head = f.read(READ_CHUNK)
+            kind = detect_format(source, head)
+            if kind == SITEMAP:
+                self._read_sitemap(source, chain([head], iter(partial(f.read, READ_CHUNK), b'')), 0)
+                return
+            f.seek(0)
+            lines = io.TextIOWrapper(f, encoding='utf-8-sig', errors='replace', newline='')
+            self.add_lines(iter_csv_cells(lines) if kind == CSV else lines)
+
+    def _read_sitemap(self, source, chunks, depth):
+        self.sitemaps += 1
+        parser = SitemapParser()
+        children = []
+        try:
+            for chunk in chunks:
+                locs = parser.feed(chunk)
+                if parser.index:
+                    children.extend(locs)
+                else:
+                    self.add_lines(locs)
+            locs = parser.close()
+        except (ParseError, zlib.error) as e:
+            self.errors.append((source, f"not a readable sitemap: {e}"))
+            return
+        if parser.index:
+            children.extend(locs)
+        else:
+            self.add_lines(locs)
+        for child in children:
+            self._fetch_sitemap(child.strip(), depth + 1)
+
+    def _fetch_sitemap(self, url, depth):
+        if url in self._visited:
+            return
+        self._visited.add(url)
+        if self.http is None:
+            self.errors.append((url, "not followed: sitemaps on the web need an HTTP client"))
+            return
+        if depth > MAX_SITEMAP_DEPTH or self.sitemaps >= self.max_sitemaps:
+            self.errors.append((url, "not followed: sitemap limit reached"))
+            return
+        try:
+            with self.http.open(url) as response:
+                response.raise_for_status()
+                self._read_sitemap(url, response.iter_bytes(READ_CHUNK), depth)
+        except Exception as e:
+            self.errors.append((url, str(e)))
+
+    def summary(self):
+        """Counts of the import, e.g. '1200 new URLs, 30 duplicates, 2 invalid'"""
+        parts = [f"{len(self.urls)} new URLs", f"{self.duplicates} duplicates", f"{self.invalid} invalid"]
+        if self.sitemaps:
+            parts.append(f"{self.sitemaps} sitemaps read")
+        if self.errors:
+            parts.append(f"{len(self.errors)} sitemaps failed")
+        return ", ".join(parts)
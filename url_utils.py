@@ -0,0 +1,54 @@
+"""URL normalization helpers shared by the crawler and URL import."""
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Query parameters that only identify a campaign or click, not the page
+TRACKING_PREFIXES = ('utm_',)
+TRACKING_PARAMS = frozenset((
+    'gclid', 'gclsrc', 'dclid', 'gbraid', 'wbraid', 'fbclid', 'msclkid', 'yclid', 'twclid', 'igshid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok', 'vero_id', 'oly_enc_id', 'oly_anon_id',
+))
+
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def strip_tracking(query):
+    """A query string without its tracking parameters; the others keep their order and encoding"""
+    return '&'.join(
+        pair for pair in query.split('&') if pair and not is_tracking_param(pair.split('=', 1)[0])
+    )
+
+
+def normalize_url(url, drop_tracking=False):
+    """Canonical form of an absolute http(s) URL, or None if it is not one.
+
+    Lowercases scheme and host, drops default ports, fragments and empty
+    query strings, and uses '/' for an empty path. With drop_tracking,
+    utm_* and click-id parameters are removed from the query as well.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    if ':' in host:
+        host = f"[{host}]"  # IPv6 literal
+    if port is not None and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+    if parts.username or parts.password:
+        userinfo = parts.username or ''
+        if parts.password:
+            userinfo += ':' + parts.password
+        host = f"{userinfo}@{host}"
+
+    query = strip_tracking(parts.query) if drop_tracking and parts.query else parts.query
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))